@@ -0,0 +1,166 @@
+import operator
+import re
+
+# Arithmetic comparisons supported in rule bodies
+COMPARISONS = {
+    '<': operator.lt,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '=<': operator.le,
+    '=:=': operator.eq,
+    '=\\=': operator.ne,
+}
+
+_COMPARISON_RE = re.compile(r'^(\S+?)\s*(=:=|=\\=|>=|=<|<|>)\s*(\S+)$')
+_CALL_RE = re.compile(r'^([a-z]\w*)\s*(?:\((.*)\))?$', re.S)
+_NUMBER_RE = re.compile(r'^-?\d+(\.\d+)?$')
+
+class RuleError(ValueError):
+    """Raised when advisor.pl uses syntax the compiler does not support"""
+
+def _split_top_level(text, sep=','):
+    """Split on `sep` outside parentheses"""
+    parts, depth, current = [], 0, []
+    for ch in text:
+        if ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+        if ch == sep and depth == 0:
+            parts.append(''.join(current).strip())
+            current = []
+        else:
+            current.append(ch)
+    if ''.join(current).strip():
+        parts.append(''.join(current).strip())
+    return parts
+
+def _clauses(source):
+    """Yield clause texts from Prolog source, without comments or the final '.'"""
+    source = re.sub(r'%[^\n]*', '', source)
+    # A clause ends with '.' followed by whitespace or end of file (so 2.5 is safe)
+    for clause in re.split(r'\.(?=\s|$)', source):
+        clause = ' '.join(clause.split())
+        if clause:
+            yield clause
+
+def _term(token):
+    """Compile an argument into fn(env) -> value"""
+    if _NUMBER_RE.match(token):
+        value = float(token) if '.' in token else int(token)
+        return lambda env: value
+    if token[:1].isupper() or token[:1] == '_':
+        return lambda env: env[token]
+    raise RuleError(f"Unsupported term: {token}")
+
+class RuleSet:
+    """
+    advisor.pl compiled into Python predicates
+
+    Handles the subset of Prolog the advisor uses: facts and rules whose
+    bodies are conjunctions of arithmetic comparisons and calls to other
+    predicates, with several clauses per predicate meaning "or". Each clause
+    is compiled once into closures, so evaluating a rule is a few Python
+    comparisons instead of a Prolog query.
+    """
+
+    def __init__(self, source):
+        self._clauses = {}
+        self._sources = {}
+        for clause in _clauses(source):
+            self._add_clause(clause)
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding='utf-8') as f:
+            return cls(f.read())
+
+    def _add_clause(self, clause):
+        head, _, body = clause.partition(':-')
+        name, params = self._parse_call(head.strip())
+        body = _split_top_level(body) if body else []
+        goals = [self._compile_goal(goal) for goal in body]
+        self._clauses.setdefault((name, len(params)), []).append((params, goals))
+        self._sources.setdefault((name, len(params)), []).append((params, body))
+
+    @staticmethod
+    def _parse_call(text):
+        match = _CALL_RE.match(text)
+        if not match:
+            raise RuleError(f"Unsupported goal: {text}")
+        args = _split_top_level(match.group(2)) if match.group(2) else []
+        return match.group(1), args
+
+    def _compile_goal(self, goal):
+        match = _COMPARISON_RE.match(goal)
+        if match:
+            left, op, right = _term(match.group(1)), COMPARISONS[match.group(2)], _term(match.group(3))
+            return lambda env: op(left(env), right(env))
+        name, args = self._parse_call(goal)
+        terms = [_term(a) for a in args]
+        return lambda env: self.holds(name, *[t(env) for t in terms])
+
+    @property
+    def predicates(self):
+        return sorted(self._clauses)
+
+    def constants(self, name, arity, position, _seen=None):
+        """
+        Every number argument `position` of name/arity is compared against
+        or matched with, following it through the predicates it is passed to.
+        Two values that compare the same way (<, = or >) with each of these
+        make the predicate give the same answer.
+        """
+        seen = set() if _seen is None else _seen
+        if (name, arity, position) in seen:
+            return set()
+        seen.add((name, arity, position))
+        found = set()
+        for params, body in self._sources.get((name, arity), []):
+            param = params[position]
+            if _NUMBER_RE.match(param):
+                found.add(_term(param)(None))
+                continue
+            for goal in body:
+                match = _COMPARISON_RE.match(goal)
+                if match:
+                    left, right = match.group(1), match.group(3)
+                    if left == param and _NUMBER_RE.match(right):
+                        found.add(_term(right)(None))
+                    elif right == param and _NUMBER_RE.match(left):
+                        found.add(_term(left)(None))
+                    continue
+                callee, args = self._parse_call(goal)
+                for i, arg in enumerate(args):
+                    if arg == param:
+                        found |= self.constants(callee, len(args), i, seen)
+        return found
+
+    def holds(self, name, *args):
+        """True when some clause of name/arity succeeds for these (ground) arguments"""
+        clauses = self._clauses.get((name, len(args)))
+        if clauses is None:
+            raise RuleError(f"Unknown predicate: {name}/{len(args)}")
+        for params, goals in clauses:
+            env = {}
+            matched = True
+            for param, value in zip(params, args):
+                if _NUMBER_RE.match(param):
+                    matched = _term(param)(env) == value
+                elif param in env:
+                    matched = env[param] == value
+                else:
+                    env[param] = value
+                if not matched:
+                    break
+            if matched and all(goal(env) for goal in goals):
+                return True
+        return False
+
+    def evaluate(self, queries, values):
+        """
+        Evaluate several rules in one pass
+        queries: [(rule_name, (arg_name, ...)), ...], values: {arg_name: value}
+        Returns {rule_name: bool}
+        """
+        return {name: self.holds(name, *[values[a] for a in args]) for name, args in queries}
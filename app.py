@@ -1,73 +1,294 @@
-from flask import Flask, render_template, request, jsonify
-import sqlite3
-from csp import csp_filter, check_prerequisites
-from ga import optimize
-from prolog_interface import get_advice
+import hashlib
+import json
+import logging
+import os
+import time
+from functools import partial
+from flask import Flask, Response, g, render_template, request, jsonify
+from cache import LRUCache
+from catalog import Catalog
+from db import Database
+from metrics import (configure_logging, gauge_lines, log, record_search, render as render_metrics,
+                     request_seconds, timer)
+from csp_pool import get_csp_pool, rank_semester
+from course_set import SemesterCourses
+from ga import load_numpy
+from pipeline import advice_stage
+from plan_index import PlanIndex
+from prolog_pool import PoolBusyError, PoolTimeoutError
+from prereq_graph import PrerequisiteGraphError
+from roadmap import LAST_SEMESTER, RoadmapError, plan_roadmap
+from slow_profiler import get_slow_profiler
+from serving import (PLAN_BUDGET, PLAN_QUEUE, PLAN_WORKERS, DeadlineExceededError, PlanExecutor,
+                     ServerBusyError)
+import prolog_interface
+from prolog_interface import advice_cache
 
 app = Flask(__name__)
+configure_logging()
+
+# PLANNER_CATALOG_CACHE=0 queries SQLite through the connection pool instead
+# of keeping the catalog in memory (for catalogs that change often)
+if os.environ.get("PLANNER_CATALOG_CACHE", "1") == "0":
+    catalog = Database()
+else:
+    catalog = Catalog()
+
+# Precomputed top plans (build_plan_index.py); PLANNER_PLAN_INDEX=0 disables
+plan_index = PlanIndex() if os.environ.get("PLANNER_PLAN_INDEX", "1") != "0" else None
+
+# Serialized /api/plan responses; PLANNER_RESPONSE_CACHE_SIZE=0 disables.
+# Send "X-Plan-Cache: bypass" to skip the cache for one request. Keys and
+# ETags include catalog.version(), so a reloaded catalog never hits old entries.
+response_cache = LRUCache(int(os.environ.get("PLANNER_RESPONSE_CACHE_SIZE", "2048")),
+                          ttl=float(os.environ.get("PLANNER_RESPONSE_CACHE_TTL", "300")))
+
+# /api/plan, /api/plan/batch and /api/roadmap work runs here: bounded
+# concurrency and a deadline per request
+plan_executor = PlanExecutor(PLAN_WORKERS, PLAN_QUEUE, PLAN_BUDGET)
+
+# cProfile of /api/plan requests slower than PLANNER_PROFILE_THRESHOLD seconds
+slow_profiler = get_slow_profiler()
+
+# A full or too slow planner or Prolog pool: 503, worth retrying shortly
+BUSY_ERRORS = (ServerBusyError, PoolBusyError, PoolTimeoutError)
+
+# Most students one /api/plan/batch call may contain
+BATCH_MAX_REQUESTS = int(os.environ.get("PLANNER_BATCH_MAX_REQUESTS", "1000"))
 
 def get_departments():
     """Get all departments"""
-    conn = sqlite3.connect("university.db")
-    conn.row_factory = sqlite3.Row
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM departments")
-    data = [dict(row) for row in cur.fetchall()]
-    conn.close()
-    return data
+    return catalog.departments()
 
 def get_programs(dept_id):
     """Get programs for a department"""
-    conn = sqlite3.connect("university.db")
-    conn.row_factory = sqlite3.Row
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM programs WHERE department_id = ?", (dept_id,))
-    data = [dict(row) for row in cur.fetchall()]
-    conn.close()
-    return data
+    return catalog.programs(dept_id)
 
 def get_completed_courses_from_previous_semesters(program_id, current_semester):
     """
     Get all courses from previous semesters for prerequisite checking
     Assumes student has completed all courses from earlier semesters
     """
-    if current_semester <= 1:
-        return []
+    return catalog.completed_courses(program_id, current_semester)
+
+def get_courses_for_semester(program_id, semester):
+    """Get all courses for a program and semester"""
+    return catalog.courses_for_semester(program_id, semester)
+
+def search_semester(program_id, semester, target_credits, preference, deadline=None, search_stats=None):
+    """
+    CSP + GA steps for validated plan inputs; nothing here depends on cgpa
+    Returns (course_set, plan bitmasks, None) or (None, None, (error payload, HTTP status))
+    With a deadline the plans may be the best found so far (search_stats['deadline_hit'])
+    """
+    if search_stats is None:
+        search_stats = {}
+    # STEP 1: Get courses for this semester
+    log.debug("Getting courses for program %s, semester %s", program_id, semester)
+    with timer('db_fetch'):
+        courses = get_courses_for_semester(program_id, semester)
+    log.debug("Found %d courses", len(courses) if courses else 0)
+
+    if not courses:
+        return None, None, ({'error': 'No courses available for this semester'}, 404)
+
+    # STEP 2: Get completed courses (all from previous semesters)
+    with timer('db_fetch'):
+        completed_courses = get_completed_courses_from_previous_semesters(program_id, semester)
+        try:
+            graph = catalog.prerequisite_graph(program_id)
+        except PrerequisiteGraphError as e:
+            return None, None, ({'error': f'This program cannot be planned right now: {e}'}, 500)
+    log.debug("Completed courses: %d", len(completed_courses))
+    checker = graph.checker(semester, (c['code'] for c in completed_courses))
+    course_set = SemesterCourses(courses, checker)
+
+    # Precomputed ranking for this key, if the plan index is current
+    best_plans = None
+    if plan_index:
+        with timer('plan_index'):
+            best_plans = plan_index.lookup(program_id, semester, target_credits, preference)
+
+    if best_plans is None:
+        # STEP 3 + 4: CSP search streamed into the GA ranking, which keeps only
+        # the top 5 and stops searching once they can no longer change
+        log.debug("Applying CSP filter + GA optimization with target=%s, preference=%s",
+                  target_credits, preference)
+        with timer('search'):
+            best_plans = rank_semester(course_set, target_credits, preference, stats=search_stats,
+                                       deadline=deadline)
+        record_search(search_stats)
+        log.debug("GA selected %d optimal plans (%s)", len(best_plans), search_stats)
+    else:
+        log.debug("Plan index returned %d plans", len(best_plans))
+
+    if not best_plans and search_stats.get('deadline_hit'):
+        return None, None, ({'error': 'Plan search ran out of time. Please try again.'}, 503)
+
+    if not best_plans:
+        # Calculate available credits
+        total_available = sum(c['credits'] for c in courses)
+        return None, None, ({
+            'error': f'Cannot generate plan with EXACTLY {target_credits} credits. Available courses provide {total_available} total credits. The system requires exact credit match - no combinations of these courses equal {target_credits} credits. Try a different credit amount (11-24).'
+        }, 400)
+
+    return course_set, best_plans, None
+
+def advise_semester(course_set, best_plans, semester, target_credits, cgpa):
+    """Prolog step for plans from search_semester(); returns the response payload"""
+    # STEP 5: Apply Prolog Expert System - Get advice for each plan
+    log.debug("Getting Prolog advice for each plan")
+    final_plans = list(advice_stage(course_set, best_plans, cgpa, target_credits, semester))
+
+    return {
+        'success': True,
+        'semester': semester,
+        'cgpa': cgpa,
+        'plans': final_plans,
+        'method': 'CSP + GA + Prolog Expert System'
+    }
+
+def plan_semester(program_id, semester, target_credits, preference, cgpa, deadline=None):
+    """
+    CSP + GA + Prolog pipeline for validated /api/plan inputs
+    Returns (response payload, HTTP status); the payload has 'partial': True
+    when the deadline cut the search short
+    """
+    search_stats = {}
+    course_set, best_plans, error = search_semester(program_id, semester, target_credits, preference,
+                                                    deadline, search_stats)
+    if error:
+        return error
+    payload = advise_semester(course_set, best_plans, semester, target_credits, cgpa)
+    if search_stats.get('deadline_hit'):
+        payload['partial'] = True
+    return payload, 200
+
+def busy_response(error):
+    """503 with Retry-After for one of BUSY_ERRORS"""
+    response = jsonify({'error': f'Server busy: {error}. Please try again.'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+def parse_student(data):
+    """
+    Validate the program_id, preference and cgpa fields /api/plan and
+    /api/roadmap share
+    Returns ((program_id, preference, cgpa), None) or (None, error message)
+    """
+    if not data:
+        return None, 'No data provided'
+    if not isinstance(data, dict):
+        return None, 'Request must be an object'
     
-    conn = sqlite3.connect("university.db")
-    conn.row_factory = sqlite3.Row
-    cur = conn.cursor()
+    program_id = data.get('program_id')
+    preference = data.get('preference', 'balanced')
+    cgpa = data.get('cgpa', 3.0)  # Default CGPA for semester 1
     
-    # Get all courses from semesters 1 to (current_semester - 1)
-    cur.execute("""
-        SELECT DISTINCT c.id, c.code, c.name, c.description, c.credits, c.difficulty,
-               pc.semester, pc.prerequisites
-        FROM courses c
-        JOIN program_courses pc ON c.id = pc.course_id
-        WHERE pc.program_id = ? AND pc.semester < ?
-        ORDER BY pc.semester, c.code
-    """, (program_id, current_semester))
+    if not isinstance(preference, str):
+        return None, 'Preference must be a string'
+    preference = preference.lower()
+    
+    if not program_id:
+        return None, 'Program is required'
+    
+    try:
+        program_id = int(program_id)
+        cgpa = float(cgpa) if cgpa else 3.0
+    except (ValueError, TypeError) as e:
+        return None, f'Invalid input format: {str(e)}'
     
-    data = [dict(row) for row in cur.fetchall()]
-    conn.close()
-    return data
+    if cgpa and not 0.0 <= cgpa <= 4.0:
+        return None, 'CGPA must be 0.0-4.0'
+    
+    return (program_id, preference, cgpa), None
 
-def get_courses_for_semester(program_id, semester):
-    """Get all courses for a program and semester"""
-    conn = sqlite3.connect("university.db")
-    conn.row_factory = sqlite3.Row
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT c.id, c.code, c.name, c.description, c.credits, c.difficulty,
-               pc.prerequisites
-        FROM courses c
-        JOIN program_courses pc ON c.id = pc.course_id
-        WHERE pc.program_id = ? AND pc.semester = ? 
-        ORDER BY c.code
-    """, (program_id, semester))
-    data = [dict(row) for row in cur.fetchall()]
-    conn.close()
-    return data
+def parse_plan_request(data):
+    """
+    Validate and normalize one /api/plan request body
+    Returns ((program_id, semester, target_credits, preference, cgpa), None)
+    or (None, error message)
+    """
+    student, error = parse_student(data)
+    if error:
+        return None, error
+    program_id, preference, cgpa = student
+    
+    semester = data.get('semester')
+    target_credits = data.get('max_credits')
+    
+    log.debug("program_id=%s, semester=%s, target_credits=%s, preference=%s, cgpa=%s",
+              program_id, semester, target_credits, preference, cgpa)
+    
+    if semester is None:
+        return None, 'Semester is required'
+    if not target_credits:
+        return None, 'Credit hours are required'
+    
+    # Convert to proper types
+    try:
+        semester = int(semester)
+        target_credits = int(target_credits)
+    except (ValueError, TypeError) as e:
+        return None, f'Invalid input format: {str(e)}'
+    
+    # Validate ranges
+    if not 1 <= semester <= 8:
+        return None, 'Semester must be 1-8'
+    if not 11 <= target_credits <= 24:
+        return None, 'Credits must be 11-24'
+    
+    return (program_id, semester, target_credits, preference, cgpa), None
+
+def warm_up(prolog=False):
+    """
+    Do the first request's setup now: load the catalog and prerequisite
+    graphs, open the plan index, import NumPy and parse advisor.pl.
+    
+    Pre-fork servers should call this once in the master process
+    (PLANNER_WARMUP=1 with e.g. gunicorn --preload) so every worker
+    inherits the loaded state; the plan index and connection pool reopen
+    their SQLite connections in each worker after the fork. prolog=True
+    also starts SWI-Prolog for the prolog/crosscheck backends; do that in
+    each worker after the fork instead, since an engine must not be shared
+    across processes.
+    Returns the seconds each step took.
+    """
+    def load_catalog():
+        for department in catalog.departments():
+            for program in catalog.programs(department['id']):
+                try:
+                    catalog.prerequisite_graph(program['id'])
+                except PrerequisiteGraphError:
+                    pass  # logged by the load; that program stays unplannable
+
+    timings = {}
+    steps = [
+        ('catalog', load_catalog),
+        ('plan_index', lambda: plan_index and plan_index.warm_up()),
+        ('numpy', load_numpy),
+        ('advice', lambda: prolog_interface.warm_up(prolog)),
+    ]
+    for name, step in steps:
+        start = time.perf_counter()
+        step()
+        timings[name] = time.perf_counter() - start
+    log.info("Warm-up done: %s", ", ".join(f"{name} {seconds * 1000:.1f}ms"
+                                            for name, seconds in timings.items()))
+    return timings
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    # Streamed responses (/api/plan/batch) are timed up to their first line
+    start = g.get('request_start')
+    if start is not None and request.path.startswith('/api/'):
+        request_seconds.observe(time.perf_counter() - start, request.url_rule.rule if request.url_rule
+                                else 'unmatched', response.status_code)
+    return response
 
 @app.route("/")
 def index():
@@ -89,6 +310,38 @@ def api_departments():
 def api_programs(dept_id):
     return jsonify({'programs': get_programs(dept_id)})
 
+@app.route("/api/stats", methods=["GET"])
+def api_stats():
+    """Cache and pool counters for diagnosing the planning path"""
+    stats = {
+        'response_cache': response_cache.stats(),
+        'advice_cache': advice_cache.stats(),
+    }
+    if plan_index:
+        stats['plan_index'] = plan_index.stats()
+    if hasattr(catalog, 'stats'):
+        stats['database'] = catalog.stats()
+    stats['plan_executor'] = plan_executor.stats()
+    if get_csp_pool():
+        stats['csp_pool'] = get_csp_pool().stats()
+    if slow_profiler:
+        stats['slow_profiler'] = slow_profiler.stats()
+    return jsonify(stats)
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Prometheus text exposition: stage and request histograms plus cache/pool gauges"""
+    lines = []
+    caches = {'response': response_cache.stats(), 'advice': advice_cache.stats()}
+    for field in ('size', 'hits', 'misses', 'evictions'):
+        lines += gauge_lines(f"planner_cache_{field}", f"Cache {field} by cache",
+                             {name: stats[field] for name, stats in caches.items()}, 'cache')
+    executor = plan_executor.stats()
+    for field in ('active', 'completed', 'rejected', 'deadlines_exceeded'):
+        lines += gauge_lines(f"planner_executor_{field}", f"Plan executor {field.replace('_', ' ')}",
+                             executor[field])
+    return Response(render_metrics(lines), mimetype='text/plain; version=0.0.4')
+
 @app.route("/api/plan", methods=["POST"])
 def api_plan():
     """
@@ -98,135 +351,186 @@ def api_plan():
     try:
         data = request.get_json()
         
-        print(f"DEBUG: Received data: {data}")
+        log.debug("Received data: %s", data)
+        
+        params, error = parse_plan_request(data)
+        if error:
+            return jsonify({'error': error}), 400
+        program_id, semester, target_credits, preference, cgpa = params
         
-        # Validate required fields
-        if not data:
-            return jsonify({'error': 'No data provided'}), 400
+        # Identical (normalized) requests against the same catalog share one
+        # cached response body
+        version = catalog.version()
+        key = (version, program_id, semester, target_credits, preference, cgpa)
+        bypass = request.headers.get('X-Plan-Cache', '').lower() == 'bypass'
+        cached = None if bypass else response_cache.get(key)
         
-        program_id = data.get('program_id')
-        semester = data.get('semester')
-        target_credits = data.get('max_credits')
-        preference = data.get('preference', 'balanced').lower()
-        cgpa = data.get('cgpa', 3.0)  # Default CGPA for semester 1
+        if cached is None:
+            try:
+                if slow_profiler:
+                    payload, status = plan_executor.run(slow_profiler.call, plan_semester, program_id,
+                                                        semester, target_credits, preference, cgpa,
+                                                        request_payload=data)
+                else:
+                    payload, status = plan_executor.run(plan_semester, program_id, semester,
+                                                        target_credits, preference, cgpa)
+            except BUSY_ERRORS as e:
+                return busy_response(e)
+            except DeadlineExceededError as e:
+                return jsonify({'error': f'{e}. Please try again.'}), 503
+            body = jsonify(payload).get_data()
+            cached = (body, status, hashlib.sha1(repr(version).encode() + body).hexdigest())
+            # Best-so-far answers are not worth repeating to the next caller
+            if not bypass and not payload.get('partial') and status != 503:
+                response_cache.put(key, cached)
+            cache_status = 'BYPASS' if bypass else 'MISS'
+        else:
+            cache_status = 'HIT'
         
-        print(f"DEBUG: program_id={program_id}, semester={semester}, target_credits={target_credits}, preference={preference}, cgpa={cgpa}")
+        body, status, etag = cached
+        if status == 200 and request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = Response(body, status=status, mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['X-Plan-Cache'] = cache_status
+        return response
         
-        if not program_id:
-            return jsonify({'error': 'Program is required'}), 400
-        if semester is None:
-            return jsonify({'error': 'Semester is required'}), 400
-        if not target_credits:
+    except Exception as e:
+        log.exception("Exception in api_plan: %s", e)
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
+
+@app.route("/api/plan/batch", methods=["POST"])
+def api_plan_batch():
+    """
+    Plan a whole cohort in one call
+    
+    Takes {"requests": [<api_plan body>, ...]} (or the bare list) and streams
+    one NDJSON line per request, in request order:
+    {"index": i, "status": <HTTP status>, "response": <api_plan payload>}.
+    Requests sharing (program_id, semester, max_credits, preference) run the
+    CSP + GA search once; only the cgpa-dependent advice is per student.
+    As in /api/plan, plans from a search cut short by the deadline come with
+    "partial": true.
+    """
+    data = request.get_json(silent=True)
+    items = data.get('requests') if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'A non-empty list of requests is required'}), 400
+    if len(items) > BATCH_MAX_REQUESTS:
+        return jsonify({'error': f'At most {BATCH_MAX_REQUESTS} requests per batch'}), 400
+    
+    # Validate everything up front so the stream never starts on bad input
+    parsed = [parse_plan_request(item) for item in items]
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("Batch of %d requests, %d search groups",
+                  len(items), len(set(params[:4] for params, _ in parsed if params)))
+    
+    def generate():
+        searches = {}
+        for index, (params, error) in enumerate(parsed):
+            if error:
+                payload, status = {'error': error}, 400
+            else:
+                program_id, semester, target_credits, preference, cgpa = params
+                try:
+                    group = params[:4]
+                    if group not in searches:
+                        search_stats = {}
+                        searches[group] = plan_executor.run(
+                            search_semester, program_id, semester, target_credits, preference,
+                            search_stats=search_stats) + (search_stats,)
+                    course_set, best_plans, search_error, search_stats = searches[group]
+                    if search_error:
+                        payload, status = search_error
+                    else:
+                        payload = advise_semester(course_set, best_plans, semester, target_credits, cgpa)
+                        if search_stats.get('deadline_hit'):
+                            payload['partial'] = True
+                        status = 200
+                except BUSY_ERRORS as e:
+                    # Not remembered: the next student in the group tries again
+                    payload, status = {'error': f'Server busy: {e}. Please try again.'}, 503
+                except DeadlineExceededError as e:
+                    payload, status = {'error': f'{e}. Please try again.'}, 503
+                except Exception as e:
+                    log.exception("Exception in api_plan_batch: %s", e)
+                    payload, status = {'error': f'Server error: {str(e)}'}, 500
+            yield json.dumps({'index': index, 'status': status, 'response': payload}) + "\n"
+    
+    return Response(generate(), mimetype='application/x-ndjson')
+
+@app.route("/api/roadmap", methods=["POST"])
+def api_roadmap():
+    """
+    Plan every semester from `semester` through the last one in one request
+    
+    Credits come from `credits_per_semester` ({semester: credits} or a list
+    starting at `semester`) or, for the same load every semester, `max_credits`.
+    """
+    try:
+        data = request.get_json()
+        
+        student, error = parse_student(data)
+        if error:
+            return jsonify({'error': error}), 400
+        program_id, preference, cgpa = student
+        
+        semester = data.get('semester', 1)
+        per_semester = data.get('credits_per_semester')
+        max_credits = data.get('max_credits')
+        budget = data.get('budget', 2.0)
+        
+        if per_semester is None and not max_credits:
             return jsonify({'error': 'Credit hours are required'}), 400
         
-        # Convert to proper types
         try:
-            program_id = int(program_id)
             semester = int(semester)
-            target_credits = int(target_credits)
-            cgpa = float(cgpa) if cgpa else 3.0
-        except (ValueError, TypeError) as e:
+            budget = float(budget)
+            semesters = range(semester, LAST_SEMESTER + 1)
+            if per_semester is None:
+                credit_targets = {s: int(max_credits) for s in semesters}
+            elif isinstance(per_semester, dict):
+                credit_targets = {int(s): int(c) for s, c in per_semester.items()}
+            else:
+                credit_targets = {s: int(c) for s, c in zip(semesters, per_semester)}
+        except (ValueError, TypeError, AttributeError) as e:
             return jsonify({'error': f'Invalid input format: {str(e)}'}), 400
         
-        # Validate ranges
-        if not 1 <= semester <= 8:
-            return jsonify({'error': 'Semester must be 1-8'}), 400
-        if not 11 <= target_credits <= 24:
+        if not 1 <= semester <= LAST_SEMESTER:
+            return jsonify({'error': f'Semester must be 1-{LAST_SEMESTER}'}), 400
+        missing = [s for s in semesters if s not in credit_targets]
+        if missing:
+            return jsonify({'error': f'Credit hours are required for semesters {missing}'}), 400
+        if not all(11 <= credit_targets[s] <= 24 for s in semesters):
             return jsonify({'error': 'Credits must be 11-24'}), 400
-        if cgpa and not 0.0 <= cgpa <= 4.0:
-            return jsonify({'error': 'CGPA must be 0.0-4.0'}), 400
-        
-        # STEP 1: Get courses for this semester
-        print(f"DEBUG: Getting courses for program {program_id}, semester {semester}")
-        courses = get_courses_for_semester(program_id, semester)
-        print(f"DEBUG: Found {len(courses) if courses else 0} courses")
-        
-        if not courses:
-            return jsonify({'error': 'No courses available for this semester'}), 404
+        if not 0.0 < budget <= 10.0:
+            return jsonify({'error': 'Budget must be 0-10 seconds'}), 400
         
-        # STEP 2: Get completed courses (all from previous semesters)
-        completed_courses = get_completed_courses_from_previous_semesters(program_id, semester)
-        print(f"DEBUG: Completed courses: {len(completed_courses)}")
-        
-        # STEP 3: Apply CSP - Filter by constraints (prerequisites, credits)
-        print(f"DEBUG: Applying CSP filter with target={target_credits}")
-        valid_plans = csp_filter(courses, target_credits, 11, 24, completed_courses)
-        print(f"DEBUG: CSP generated {len(valid_plans)} valid plans")
-        
-        if not valid_plans:
-            # Calculate available credits
-            total_available = sum(c['credits'] for c in courses)
-            return jsonify({
-                'error': f'Cannot generate plan with EXACTLY {target_credits} credits. Available courses provide {total_available} total credits. The system requires exact credit match - no combinations of these courses equal {target_credits} credits. Try a different credit amount (11-24).'
-            }), 400
-        
-        # STEP 4: Apply GA - Optimize plans based on preference
-        print(f"DEBUG: Applying GA optimization with preference={preference}")
-        optimized_plans = optimize(valid_plans, preference, target_credits)
-        print(f"DEBUG: GA selected {len(optimized_plans)} optimal plans")
-        
-        if not optimized_plans:
-            return jsonify({'error': 'Could not optimize plans'}), 400
-        
-        # STEP 5: Apply Prolog Expert System - Get advice for each plan
-        print(f"DEBUG: Getting Prolog advice for each plan")
-        final_plans = []
+        if not all(get_courses_for_semester(program_id, s) for s in semesters):
+            return jsonify({'error': f'No courses found for program {program_id} in every semester'}), 404
         
-        for plan in optimized_plans:
-            # Verify exact credit match (should always be true)
-            if plan['total_credits'] != target_credits:
-                print(f"WARNING: Plan has {plan['total_credits']} credits, expected {target_credits}")
-                continue  # Skip plans that don't match exactly
-            
-            advice = get_advice(cgpa, plan['courses'])
-            
-            # Add prerequisite warning if any violations exist
-            if not plan.get('all_prereqs_met', True):
-                violations = plan.get('constraint_violations', 0)
-                prereq_warning = f"⚠️ NOTE: {violations} course(s) in this plan have unmet prerequisites. Alternative courses were selected to meet your EXACT {target_credits} credit requirement."
-                if 'warnings' not in advice:
-                    advice['warnings'] = []
-                advice['warnings'].insert(0, prereq_warning)
-            else:
-                # Add confirmation that credits are exact
-                if 'advice' not in advice:
-                    advice['advice'] = []
-                advice['advice'].insert(0, f"✓ This plan provides EXACTLY {target_credits} credits as requested")
-            
-            final_plans.append({
-                'total_credits': plan['total_credits'],
-                'course_count': len(plan['courses']),
-                'all_prereqs_met': plan.get('all_prereqs_met', True),
-                'courses': [
-                    {
-                        'code': c['code'],
-                        'name': c['name'],
-                        'description': c['description'],
-                        'credits': c['credits'],
-                        'difficulty': c['difficulty'],
-                        'semester': semester,
-                        'prerequisites': c['prerequisites']
-                    }
-                    for c in plan['courses']
-                ],
-                'expert_advice': advice  # Prolog-based advice
-            })
-        
-        response = {
-            'success': True,
-            'semester': semester,
-            'cgpa': cgpa,
-            'plans': final_plans,
-            'method': 'CSP + GA + Prolog Expert System'
-        }
-        
-        return jsonify(response)
+        try:
+            # The roadmap's own budget is capped by the executor's deadline
+            payload = plan_executor.run(partial(plan_roadmap, budget=budget), catalog, program_id,
+                                        semester, {s: credit_targets[s] for s in semesters},
+                                        preference, cgpa)
+        except BUSY_ERRORS as e:
+            return busy_response(e)
+        except DeadlineExceededError as e:
+            return jsonify({'error': f'{e}. Please try again.'}), 503
+        except RoadmapError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        except PrerequisiteGraphError as e:
+            return jsonify({'error': f'This program cannot be planned right now: {e}'}), 500
+        return jsonify(payload)
         
     except Exception as e:
-        print(f"ERROR: Exception in api_plan: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        log.exception("Exception in api_roadmap: %s", e)
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
+if os.environ.get("PLANNER_WARMUP", "0") == "1":
+    warm_up()
+
 if __name__ == "__main__":
     app.run(debug=True)
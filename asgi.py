@@ -0,0 +1,18 @@
+"""
+ASGI entry point, for serving the planner from an asyncio server:
+
+    uvicorn asgi:application --workers 2
+
+Needs asgiref (pip install -r requirements.txt). Each request still runs as
+a WSGI call in a thread; /api/plan, /api/plan/batch and /api/roadmap work goes
+through app.plan_executor, which bounds concurrency and gives every request a
+deadline.
+"""
+try:
+    from asgiref.wsgi import WsgiToAsgi
+except ImportError as e:
+    raise ImportError("asgi.py needs asgiref: pip install -r requirements.txt") from e
+
+from app import app
+
+application = WsgiToAsgi(app)
@@ -0,0 +1,267 @@
+"""
+Benchmarks for the planning path: CSP search, GA ranking, Prolog advice and
+the whole /api/plan request through Flask's test client, plus a cohort sent
+to /api/plan/batch against the same cohort as one /api/plan call per student
+
+    python benchmark.py                           # JSON report on stdout
+    python benchmark.py --output bench.json       # save it (e.g. as a baseline)
+    python benchmark.py --baseline bench.json     # compare, exit 1 on regressions
+
+Runs against university.db and synthetic catalogs with 11, 20, 40 and 60
+courses per semester (--sizes). Every benchmark reports p50/p95 latency,
+throughput and the peak traced memory of a separate tracemalloc pass. Each
+catalog also gets the query_audit.py check, which fails the run on table scans
+and on queries it cannot plan.
+The startup benchmark times `import app`, app.warm_up() and the first
+/api/plan in fresh interpreters (--startup-runs).
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Measure the search itself, not the precomputed index or response cache
+os.environ.setdefault("PLANNER_PLAN_INDEX", "0")
+
+import app as planner_app
+from catalog import DB_PATH, Catalog
+from csp import csp_filter
+from ga import optimize
+from generate_catalog import generate_catalog
+from prolog_interface import advice_cache, get_advice
+from query_audit import audit_database
+
+# Child process for the startup benchmark: times `import app`, app.warm_up()
+# and the first /api/plan request, with or without the warm-up
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import app
+timings = {'import_app': time.perf_counter() - start}
+if sys.argv[1] == 'warm':
+    start = time.perf_counter()
+    app.warm_up()
+    timings['warm_up'] = time.perf_counter() - start
+client = app.app.test_client()
+start = time.perf_counter()
+client.post('/api/plan', json={'program_id': 1, 'semester': 3, 'max_credits': 18, 'preference': 'easy'})
+timings['first_plan_' + sys.argv[1]] = time.perf_counter() - start
+print(json.dumps(timings))
+"""
+
+PREFERENCES = ["easy", "balanced", "challenging"]
+CREDIT_TARGETS = [12, 15, 18, 21, 24]
+MEMORY_CALLS = 10
+# Batch benchmark cohorts: COHORT_KEYS request keys, one student per CGPA each
+COHORT_KEYS = 4
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def measure(fn, cases):
+    """Latency / throughput / peak memory of fn(*case) over every case"""
+    timings = []
+    start = time.perf_counter()
+    for case in cases:
+        t0 = time.perf_counter()
+        fn(*case)
+        timings.append(time.perf_counter() - t0)
+    total = time.perf_counter() - start
+
+    # Memory in its own pass: tracemalloc slows everything down
+    tracemalloc.start()
+    for case in cases[:MEMORY_CALLS]:
+        fn(*case)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return dict(summarize(timings),
+                throughput_per_s=round(len(cases) / total, 1) if total else None,
+                peak_memory_kb=round(peak / 1024, 1))
+
+def summarize(timings):
+    """Call count and p50/p95/mean latency (ms) of a list of durations in seconds"""
+    timings = sorted(timings)
+    return {
+        'calls': len(timings),
+        'p50_ms': round(percentile(timings, 50) * 1000, 3),
+        'p95_ms': round(percentile(timings, 95) * 1000, 3),
+        'mean_ms': round(sum(timings) / len(timings) * 1000, 3),
+    }
+
+def bench_startup(runs):
+    """
+    Cold-start cost in fresh interpreters: `import app`, app.warm_up() and
+    the first /api/plan with and without the warm-up (STARTUP_SCRIPT)
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    timings = {}
+    for _ in range(runs):
+        for mode in ('cold', 'warm'):
+            output = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT, mode], cwd=here,
+                                    capture_output=True, text=True, check=True).stdout
+            for name, seconds in json.loads(output.splitlines()[-1]).items():
+                timings.setdefault(name, []).append(seconds)
+    return {name: summarize(values) for name, values in timings.items()}
+
+def sample_keys(catalog, samples, seed):
+    """Random (program_id, semester, target_credits, preference) keys that have courses"""
+    programs = [p['id'] for d in catalog.departments() for p in catalog.programs(d['id'])]
+    keys = [(p, s, t, pref) for p in programs for s in range(1, 9) for t in CREDIT_TARGETS
+            for pref in PREFERENCES if catalog.courses_for_semester(p, s)]
+    rng = random.Random(seed)
+    return rng.sample(keys, min(samples, len(keys)))
+
+def bench_catalog(catalog, samples, seed):
+    """Every benchmark on one catalog"""
+    keys = sample_keys(catalog, samples, seed)
+    inputs = []
+    for program_id, semester, target_credits, preference in keys:
+        courses = catalog.courses_for_semester(program_id, semester)
+        completed = catalog.completed_courses(program_id, semester)
+        inputs.append((courses, completed, target_credits, preference))
+
+    results = {}
+    results['csp_filter'] = measure(
+        lambda courses, completed, t, pref: csp_filter(courses, t, 11, 24, completed), inputs)
+
+    plans = [(csp_filter(courses, t, 11, 24, completed), pref, t)
+             for courses, completed, t, pref in inputs]
+    results['ga_optimize'] = measure(optimize, plans)
+
+    cgpas = [2.0, 2.4, 2.8, 3.2, 3.6, 3.9]
+    advice_inputs = [(cgpas[i % len(cgpas)], plan['courses'])
+                     for i, (candidates, _, _) in enumerate(plans) for plan in candidates[:1]]
+
+    def advice_cold(cgpa, courses):
+        advice_cache.clear()
+        return get_advice(cgpa, courses)
+
+    results['advice_uncached'] = measure(advice_cold, advice_inputs)
+    results['advice_cached'] = measure(get_advice, advice_inputs)
+
+    # Point the app at this catalog; bypass the response cache on every call
+    planner_app.catalog = catalog
+    planner_app.plan_index = None
+    client = planner_app.app.test_client()
+    bodies = [({'program_id': p, 'semester': s, 'max_credits': t, 'preference': pref,
+                'cgpa': cgpas[i % len(cgpas)]},)
+              for i, (p, s, t, pref) in enumerate(keys)]
+
+    def api_plan(body):
+        response = client.post('/api/plan', json=body, headers={'X-Plan-Cache': 'bypass'})
+        if response.status_code >= 500:
+            raise RuntimeError(f"/api/plan failed for {body}: {response.get_data(as_text=True)}")
+
+    results['api_plan'] = measure(api_plan, bodies)
+
+    # The same cohorts through /api/plan/batch (one search per key) and as
+    # one /api/plan per student; neither may answer from the response cache
+    cohorts = [([dict(body, cgpa=cgpa) for (body,) in bodies[i:i + COHORT_KEYS] for cgpa in cgpas],)
+               for i in range(0, len(bodies), COHORT_KEYS)]
+
+    def api_plan_sequential(cohort):
+        for body in cohort:
+            api_plan(body)
+
+    def api_plan_batch(cohort):
+        response = client.post('/api/plan/batch', json={'requests': cohort},
+                               headers={'X-Plan-Cache': 'bypass'})
+        lines = response.get_data(as_text=True).splitlines()
+        if response.status_code != 200 or any(json.loads(line)['status'] >= 500 for line in lines):
+            raise RuntimeError(f"/api/plan/batch failed: {response.get_data(as_text=True)}")
+
+    for name, fn in (('cohort_sequential', api_plan_sequential), ('cohort_batch', api_plan_batch)):
+        results[name] = dict(measure(fn, cohorts), cohort_size=len(cohorts[0][0]))
+    return results
+
+def run(sizes, samples, seed, startup_runs=5):
+    report = {'python': sys.version.split()[0], 'samples': samples, 'seed': seed,
+              'catalogs': {}, 'query_audit': {}}
+    if startup_runs:
+        report['startup'] = bench_startup(startup_runs)
+    report['catalogs']['university'] = bench_catalog(Catalog(DB_PATH, check_mtime=False), samples, seed)
+    report['query_audit']['university'] = audit_database(DB_PATH)[1]
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            path = os.path.join(tmp, f"synthetic_{size}.db")
+            generate_catalog(path, departments=1, programs_per_department=2,
+                             courses_per_semester=size, seed=seed)
+            report['catalogs'][f"synthetic_{size}"] = bench_catalog(
+                Catalog(path, check_mtime=False), samples, seed)
+            report['query_audit'][f"synthetic_{size}"] = audit_database(path, None)[1]
+    return report
+
+def compare(report, baseline, threshold, min_delta_ms):
+    """Lines describing every p50/p95 that got more than `threshold` times slower"""
+    regressions = []
+    groups = dict(report['catalogs'], startup=report.get('startup', {}))
+    old_groups = dict(baseline.get('catalogs', {}), startup=baseline.get('startup', {}))
+    for catalog_name, benches in groups.items():
+        for bench, result in benches.items():
+            old = old_groups.get(catalog_name, {}).get(bench)
+            if not old:
+                continue
+            for metric in ('p50_ms', 'p95_ms'):
+                before, after = old[metric], result[metric]
+                if after > before * threshold and after - before > min_delta_ms:
+                    regressions.append(f"{catalog_name}/{bench} {metric}: {before} -> {after} ms")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default="11,20,40,60",
+                        help="courses per semester of the synthetic catalogs (empty: none)")
+    parser.add_argument('--samples', type=int, default=100, help="requests per catalog")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--startup-runs', type=int, default=5,
+                        help="fresh interpreters for the startup benchmark (0: skip it)")
+    parser.add_argument('--output', help="write the JSON report here instead of stdout")
+    parser.add_argument('--baseline', help="compare against a saved report")
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help="slowdown factor that counts as a regression")
+    parser.add_argument('--min-delta-ms', type=float, default=0.05,
+                        help="ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+    report = run(sizes, args.samples, args.seed, args.startup_runs)
+
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+        print(f"✅ Benchmark report written to {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+    # EXPLAIN QUERY PLAN audit (query_audit.py): table scans and queries that
+    # cannot be planned fail the run
+    audit_failures = [f"{name}/{line}" for name, lines in report['query_audit'].items() for line in lines]
+    if audit_failures:
+        print(f"❌ {len(audit_failures)} quer{'y' if len(audit_failures) == 1 else 'ies'} failed the audit:",
+              file=sys.stderr)
+        for line in audit_failures:
+            print(f"   {line}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s) against {args.baseline}:", file=sys.stderr)
+            for line in regressions:
+                print(f"   {line}", file=sys.stderr)
+            sys.exit(1)
+        print(f"✅ No regressions against {args.baseline} (threshold {args.threshold}x)", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+import sys
+import time
+
+from plan_index import INDEX_PATH, IndexLockedError, build_index
+
+start = time.perf_counter()
+try:
+    keys = build_index()
+except IndexLockedError as e:
+    print(f"❌ Plan index not built: {e}")
+    sys.exit(1)
+elapsed = time.perf_counter() - start
+
+print(f"✅ Plan index built successfully!")
+print(f"   File: {INDEX_PATH}")
+print(f"   Keys (program × semester × credits × preference): {keys}")
+print(f"   Build time: {elapsed:.1f}s")
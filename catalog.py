@@ -0,0 +1,174 @@
+import os
+import sqlite3
+import threading
+
+from metrics import log
+from prereq_graph import ProgramGraph, load_graphs
+
+DB_PATH = "university.db"
+
+# Whole-table reads for Catalog._load (query_audit.py allows these to scan)
+LOAD_DEPARTMENTS_SQL = "SELECT * FROM departments"
+
+LOAD_PROGRAMS_SQL = "SELECT * FROM programs"
+
+LOAD_COURSES_SQL = """
+    SELECT c.id, c.code, c.name, c.description, c.credits, c.difficulty,
+           pc.program_id, pc.semester, pc.prerequisites
+    FROM courses c
+    JOIN program_courses pc ON c.id = pc.course_id
+    ORDER BY pc.program_id, pc.semester, c.code
+"""
+
+def db_version(db_path):
+    """
+    Modification times of a catalog database and its WAL file
+
+    In WAL mode a write only touches db_path-wal until the next checkpoint,
+    so the main file's mtime alone would miss it.
+    """
+    version = []
+    for path in (db_path, db_path + "-wal"):
+        try:
+            version.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            version.append(None)
+    return tuple(version)
+
+class Catalog:
+    """
+    In-memory copy of the read-only course catalog
+
+    Departments, programs, courses and program_courses are loaded in one pass
+    and indexed by department and by (program_id, semester), so lookups on the
+    request path do no SQL. The DB file's mtime (db_version()) is checked on
+    access and the catalog reloads itself when create_db_new.py (or anything
+    else) rewrites it; invalidate() forces a reload on the next access.
+
+    Returned lists are fresh, but the dicts inside them are shared and must be
+    treated as read-only.
+    """
+
+    def __init__(self, db_path=DB_PATH, check_mtime=True):
+        self.db_path = db_path
+        self.check_mtime = check_mtime
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._loaded = False
+        self.loads = 0
+
+    def invalidate(self):
+        """Drop the cached data; the next access reloads it from disk"""
+        with self._lock:
+            self._loaded = False
+
+    def _db_mtime(self):
+        return db_version(self.db_path)
+
+    def _ensure_loaded(self):
+        if self._loaded and not self.check_mtime:
+            return
+        mtime = self._db_mtime()
+        if self._loaded and mtime == self._mtime:
+            return
+        with self._lock:
+            if not self._loaded or mtime != self._mtime:
+                self._load()
+                self._mtime = mtime
+                self._loaded = True
+
+    def _load(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            cur = conn.cursor()
+            cur.execute(LOAD_DEPARTMENTS_SQL)
+            departments = [dict(row) for row in cur.fetchall()]
+
+            cur.execute(LOAD_PROGRAMS_SQL)
+            programs_by_department = {}
+            for row in cur.fetchall():
+                program = dict(row)
+                programs_by_department.setdefault(program['department_id'], []).append(program)
+
+            cur.execute(LOAD_COURSES_SQL)
+            rows = [dict(row) for row in cur.fetchall()]
+
+            # Validated here, once per load; a program with bad prerequisites
+            # is only unplannable, the rest of the catalog keeps serving
+            graph_errors = {}
+            graphs = load_graphs(conn, errors=graph_errors)
+            for program_id, error in sorted(graph_errors.items()):
+                log.error("Program %s cannot be planned: %s", program_id, error)
+        finally:
+            conn.close()
+
+        semester_courses = {}
+        semester_rows = {}
+        for row in rows:
+            key = (row.pop('program_id'), row['semester'])
+            semester_rows.setdefault(key, []).append(row)
+            course = dict(row)
+            del course['semester']
+            semester_courses.setdefault(key, []).append(course)
+
+        # Completed courses for semester s = every row from semesters 1..s-1,
+        # ordered by semester then code (same as the old per-request query)
+        completed = {}
+        program_rows = {}
+        last_semester = {}
+        for program_id, semester in semester_rows:
+            last_semester[program_id] = max(semester, last_semester.get(program_id, 0))
+        for program_id, last in last_semester.items():
+            done = []
+            for semester in range(1, last + 2):
+                completed[(program_id, semester)] = tuple(done)
+                done.extend(semester_rows.get((program_id, semester), []))
+            program_rows[program_id] = tuple(done)
+
+        self._departments = departments
+        self._programs = programs_by_department
+        self._semester_courses = semester_courses
+        self._completed = completed
+        self._program_rows = program_rows
+        self._graphs = graphs
+        self._graph_errors = graph_errors
+        self.loads += 1
+
+    def version(self):
+        """Changes whenever the catalog is reloaded (keys response caches)"""
+        self._ensure_loaded()
+        return (self._mtime, self.loads)
+
+    def departments(self):
+        self._ensure_loaded()
+        return list(self._departments)
+
+    def programs(self, dept_id):
+        self._ensure_loaded()
+        return list(self._programs.get(dept_id, []))
+
+    def courses_for_semester(self, program_id, semester):
+        self._ensure_loaded()
+        return list(self._semester_courses.get((program_id, semester), []))
+
+    def completed_courses(self, program_id, current_semester):
+        """All courses from semesters before current_semester"""
+        if current_semester <= 1:
+            return []
+        self._ensure_loaded()
+        completed = self._completed.get((program_id, current_semester))
+        if completed is None:
+            # Past the program's last semester: everything taken so far
+            completed = self._program_rows.get(program_id, ())
+        return list(completed)
+
+    def prerequisite_graph(self, program_id):
+        """
+        ProgramGraph of the program's prerequisites (empty for unknown programs)
+        Raises the load's PrerequisiteGraphError for a program with invalid ones
+        """
+        self._ensure_loaded()
+        if program_id in self._graph_errors:
+            raise self._graph_errors[program_id]
+        return self._graphs.get(program_id) or ProgramGraph(program_id)
@@ -0,0 +1,75 @@
+DIFFICULTY_LEVELS = ['Easy', 'Balanced', 'Challenging']
+DIFFICULTY_CODES = {d: i for i, d in enumerate(DIFFICULTY_LEVELS)}
+
+class SemesterCourses:
+    """
+    Compact, index-based view of one semester's courses
+
+    Courses are numbered 0..n-1 and their credits, difficulty codes and
+    prerequisite flags live in parallel lists. A plan is a plain int bitmask
+    (bit i set = courses[i] taken), so the search and scoring loops handle one
+    int per candidate. Course dicts are only built again by materialize().
+    """
+
+    def __init__(self, courses, checker=None):
+        self.courses = list(courses)
+        self.credits = [c['credits'] for c in self.courses]
+        self.difficulty = [DIFFICULTY_CODES[c['difficulty']] for c in self.courses]
+        if checker is None:
+            self.prereq_met = [True] * len(self.courses)
+        else:
+            self.prereq_met = checker.flags(self.courses)
+
+        # Bitmasks used for popcount-based counting
+        self.unmet_mask = 0
+        self.difficulty_masks = [0] * len(DIFFICULTY_LEVELS)
+        for i in range(len(self.courses)):
+            if not self.prereq_met[i]:
+                self.unmet_mask |= 1 << i
+            self.difficulty_masks[self.difficulty[i]] |= 1 << i
+
+    def __len__(self):
+        return len(self.courses)
+
+    @property
+    def met_indices(self):
+        """Indices of courses whose prerequisites are satisfied"""
+        return [i for i, met in enumerate(self.prereq_met) if met]
+
+    @staticmethod
+    def indices(mask):
+        """Course indices in a plan, in ascending order"""
+        result = []
+        i = 0
+        while mask:
+            if mask & 1:
+                result.append(i)
+            mask >>= 1
+            i += 1
+        return result
+
+    @staticmethod
+    def size(mask):
+        return mask.bit_count()
+
+    def total_credits(self, mask):
+        return sum(self.credits[i] for i in self.indices(mask))
+
+    def violations(self, mask):
+        return (mask & self.unmet_mask).bit_count()
+
+    def difficulty_counts(self, mask):
+        """Number of Easy/Balanced/Challenging courses in a plan, by code"""
+        return [(mask & dm).bit_count() for dm in self.difficulty_masks]
+
+    def materialize(self, mask, total_credits=None):
+        """Build the plan dict that the rest of the pipeline serializes"""
+        violations = self.violations(mask)
+        if total_credits is None:
+            total_credits = self.total_credits(mask)
+        return {
+            'courses': [self.courses[i] for i in self.indices(mask)],
+            'total_credits': total_credits,
+            'constraint_violations': violations,
+            'all_prereqs_met': violations == 0
+        }
@@ -1,48 +1,16 @@
 import sqlite3
 
+from generate_catalog import create_schema
+from prereq_graph import migrate
+
 conn = sqlite3.connect('university.db')
 cur = conn.cursor()
 
-# Create tables
-cur.execute("""
-    CREATE TABLE IF NOT EXISTS departments (
-        id INTEGER PRIMARY KEY,
-        name TEXT NOT NULL UNIQUE
-    )
-""")
-
-cur.execute("""
-    CREATE TABLE IF NOT EXISTS programs (
-        id INTEGER PRIMARY KEY,
-        department_id INTEGER NOT NULL,
-        name TEXT NOT NULL UNIQUE,
-        FOREIGN KEY (department_id) REFERENCES departments(id)
-    )
-""")
-
-cur.execute("""
-    CREATE TABLE IF NOT EXISTS courses (
-        id INTEGER PRIMARY KEY,
-        code TEXT NOT NULL UNIQUE,
-        name TEXT NOT NULL,
-        description TEXT,
-        credits INTEGER NOT NULL,
-        difficulty TEXT NOT NULL
-    )
-""")
-
-cur.execute("""
-    CREATE TABLE IF NOT EXISTS program_courses (
-        id INTEGER PRIMARY KEY,
-        program_id INTEGER NOT NULL,
-        course_id INTEGER NOT NULL,
-        semester INTEGER NOT NULL,
-        prerequisites TEXT,
-        UNIQUE(program_id, course_id, semester),
-        FOREIGN KEY (program_id) REFERENCES programs(id),
-        FOREIGN KEY (course_id) REFERENCES courses(id)
-    )
-""")
+# Create tables (shared with generate_catalog.py) and clear any previous
+# catalog, so the script can be re-run
+create_schema(cur)
+for table in ("program_courses", "courses", "programs", "departments"):
+    cur.execute(f"DELETE FROM {table}")
 
 # Insert departments
 departments = [
@@ -252,3 +220,14 @@ print(f"   Program-Course Mappings: {mappings_count}")
 print(f"   Constraint: Each semester has exactly 11 courses")
 print(f"   - 7 courses are UNIQUE to that semester")
 print(f"   - 4 courses can be shared across semesters")
+
+# Normalize prerequisites into the edge / order / closure tables
+conn = sqlite3.connect('university.db')
+prereq_edges = migrate(conn)
+conn.close()
+print(f"✅ Prerequisite graph migrated: {prereq_edges} edges")
+
+# Rebuild the precomputed plan index for the new catalog
+from plan_index import build_index
+plan_keys = build_index()
+print(f"✅ Plan index rebuilt: {plan_keys} keys")
@@ -1,24 +1,216 @@
+import time
+from collections import namedtuple
+from functools import lru_cache
+
+from course_set import SemesterCourses
+
+@lru_cache(maxsize=4096)
+def parse_prerequisites(prereqs):
+    """Parse a comma-separated prerequisite string into a frozenset of codes"""
+    if not prereqs:
+        return frozenset()
+    return frozenset(p.strip() for p in prereqs.split(',') if p.strip())
+
+class PrerequisiteChecker:
+    """
+    Prerequisite evaluation for one planning request
+    
+    The completed-code set is built once, each course's prerequisite string is
+    parsed once (parse_prerequisites is cached across requests) and the
+    satisfied/unsatisfied status is remembered per course, so repeated checks
+    inside the search loops are plain dict lookups.
+    """
+    
+    def __init__(self, completed_courses=None):
+        self.completed_codes = frozenset(c['code'] for c in completed_courses or [])
+        self._status = {}
+    
+    def is_satisfied(self, course):
+        key = course.get('id', course.get('code'))
+        status = self._status.get(key)
+        if status is None:
+            required = parse_prerequisites(course.get('prerequisites'))
+            status = required <= self.completed_codes
+            self._status[key] = status
+        return status
+    
+    def flags(self, courses):
+        """Satisfied flag for each course, in order"""
+        return [self.is_satisfied(c) for c in courses]
+    
+    def unmet_mask(self, courses):
+        """Bitmask with bit i set when courses[i] has unmet prerequisites"""
+        mask = 0
+        for i, c in enumerate(courses):
+            if not self.is_satisfied(c):
+                mask |= 1 << i
+        return mask
+
 def check_prerequisites(course, completed_courses):
     """Check if all prerequisites for a course are satisfied"""
-    prereqs = course.get('prerequisites', '')
-    if prereqs is None or not prereqs or prereqs == '':
-        return True
-    prereqs = prereqs.strip()
-    if not prereqs:
+    if isinstance(completed_courses, PrerequisiteChecker):
+        return completed_courses.is_satisfied(course)
+    required = parse_prerequisites(course.get('prerequisites'))
+    if not required:
         return True
+    return required <= set(c['code'] for c in completed_courses)
+
+def reachable_credit_table(credits):
+    """
+    Credit-indexed DP table for exact-credit subset search
+
+    table[i][k] is a bitset (Python int) whose bit s is set when some
+    selection of exactly k courses from credits[i:] adds up to s credits.
+    Building it costs O(n^2) big-int shifts, i.e. courses x credit range.
+    """
+    n = len(credits)
+    table = [[0] * (n + 2) for _ in range(n + 1)]
+    table[n][0] = 1
+    for i in range(n - 1, -1, -1):
+        row, below = table[i], table[i + 1]
+        row[0] = 1
+        for k in range(1, n - i + 1):
+            row[k] = below[k] | (below[k - 1] << credits[i])
+    return table
+
+def exact_credit_subsets(credits, target_credits, size, table=None):
+    """
+    Yield index tuples of `size` courses whose credits sum to target_credits
+
+    Branch-and-bound over the DP table: a course is only tried when the
+    remaining courses can still close the credit gap exactly, so every branch
+    ends in a valid plan. Tuples come out in itertools.combinations order.
+    """
+    if table is None:
+        table = reachable_credit_table(credits)
+    n = len(credits)
+    if size < 0 or size > n or not (table[0][size] >> target_credits) & 1:
+        return
+
+    chosen = []
+
+    def search(start, slots, remaining):
+        if slots == 0:
+            yield tuple(chosen)
+            return
+        for i in range(start, n - slots + 1):
+            rest = remaining - credits[i]
+            if rest < 0 or not (table[i + 1][slots - 1] >> rest) & 1:
+                continue
+            chosen.append(i)
+            yield from search(i + 1, slots - 1, rest)
+            chosen.pop()
+
+    yield from search(0, size, target_credits)
+
+def plan_combos(credits, target_credits, size, table=None, required=0, limit=None, deadline=None):
+    """
+    exact_credit_subsets() tuples, keeping only those that use an index in the
+    `required` bitmask (0 keeps all), at most `limit` of them. Stops early
+    once time.monotonic() passes `deadline` (checked every 64 tuples).
+    """
+    count = 0
+    for seen, combo in enumerate(exact_credit_subsets(credits, target_credits, size, table)):
+        if deadline is not None and seen % 64 == 0 and time.monotonic() > deadline:
+            return
+        if required and not any((required >> i) & 1 for i in combo):
+            continue
+        yield combo
+        count += 1
+        if limit is not None and count >= limit:
+            return
+
+# One (strategy, size) slice of the search. `masks` is a generator of the
+# level's plans; `sizes` lists the plan sizes from this one up to the
+# strategy's max_size that can still hit the target, and min_violations is
+# the fewest violations any of those plans can have.
+PlanLevel = namedtuple('PlanLevel', 'strategy size pool sizes min_violations masks')
+
+def iter_plan_levels(course_set, target_credits, min_credits=11, max_credits=24,
+                     max_plans=50, min_plans=10, max_courses=15, plan_limit=1000, deadline=None):
+    """
+    Exact-credit plan search over a SemesterCourses table, level by level
+    
+    Yields PlanLevel objects: Strategy 1 (clean) levels first, then Strategy 2
+    levels, each smallest plan size first. A level's masks must be consumed
+    before asking for the next level. Plans are generated by an exact-credit
+    DP search, so only subsets hitting target_credits are ever visited. Once
+    max_plans is reached the current plan size is finished and the search
+    stops; plan_limit is a hard ceiling for very wide semesters.
+    
+    Each level stops scanning once time.monotonic() passes `deadline`, so a
+    caller checking the deadline between plans is not held up inside a level
+    that skips most of its tuples.
+    """
+    if not min_credits <= target_credits <= max_credits:
+        return
     
-    # Get list of prerequisite course codes
-    prereq_list = [p.strip() for p in prereqs.split(',')]
-    completed_codes = set(c['code'] for c in completed_courses)
+    found = 0
     
-    # Check if all prerequisites are in completed courses
-    for prereq in prereq_list:
-        if prereq not in completed_codes:
-            return False
+    def level_masks(pool, credits, table, r, skip_clean):
+        nonlocal found
+        bits = [1 << i for i in pool]
+        # Strategy 2 only keeps plans with a violation: require an unmet course
+        required = 0
+        if skip_clean:
+            for local, i in enumerate(pool):
+                if (course_set.unmet_mask >> i) & 1:
+                    required |= 1 << local
+            if not required:
+                return
+        for combo in plan_combos(credits, target_credits, r, table, required, plan_limit - found,
+                                 deadline):
+            mask = 0
+            for i in combo:
+                mask |= bits[i]
+            found += 1
+            yield mask
+            if found >= plan_limit:
+                return
     
-    return True
+    def collect(strategy, pool, max_size, skip_clean=False):
+        credits = [course_set.credits[i] for i in pool]
+        table = reachable_credit_table(credits)
+        feasible = [r for r in range(1, max_size + 1) if (table[0][r] >> target_credits) & 1]
+        for pos, r in enumerate(feasible):
+            yield PlanLevel(strategy, r, pool, feasible[pos:], 1 if skip_clean else 0,
+                            level_masks(pool, credits, table, r, skip_clean))
+            
+            # Stop if we have enough plans
+            if found >= max_plans or found >= plan_limit:
+                return
+    
+    # STRATEGY 1: Build plans from courses with satisfied (or no) prerequisites
+    preferred = course_set.met_indices
+    if preferred:
+        yield from collect(1, preferred, len(preferred))
+    
+    # STRATEGY 2: If not enough plans, include courses with unmet prerequisites
+    # but mark them as having violations (to be replaced/warned). Strategy 1
+    # already found every clean plan, so only plans with violations are added.
+    if found < min_plans:
+        yield from collect(2, list(range(len(course_set))), min(len(course_set), max_courses),
+                           skip_clean=True)
+
+def iter_plans(course_set, target_credits, min_credits=11, max_credits=24, **search_options):
+    """
+    Plan bitmasks from iter_plan_levels() in search order, as one generator
+    """
+    for level in iter_plan_levels(course_set, target_credits, min_credits, max_credits,
+                                  **search_options):
+        yield from level.masks
 
-def csp_filter(courses, target_credits, min_credits=11, max_credits=24, completed_courses=None):
+def csp_search(course_set, target_credits, min_credits=11, max_credits=24, **search_options):
+    """
+    All iter_plans() results as a list ordered like csp_filter's result
+    (fewer violations first, search order within equal violations)
+    """
+    plans = list(iter_plans(course_set, target_credits, min_credits, max_credits, **search_options))
+    plans.sort(key=course_set.violations)
+    return plans
+
+def csp_filter(courses, target_credits, min_credits=11, max_credits=24, completed_courses=None,
+               checker=None, **search_options):
     """
     CSP-based course filtering with hard constraints:
     1. Total credits must EXACTLY equal target_credits (NO TOLERANCE)
@@ -29,80 +221,15 @@ def csp_filter(courses, target_credits, min_credits=11, max_credits=24, complete
     
     STRATEGY: Replace courses with unmet prerequisites instead of removing them
     
+    Pass a PrerequisiteChecker as `checker` to reuse prerequisite status that
+    was already computed for this request. See iter_plans for the search
+    options.
+    
     Returns list of valid course combinations
     """
-    if completed_courses is None:
-        completed_courses = []
-    
-    from itertools import combinations
-    
-    # Separate courses by prerequisite status
-    prereq_satisfied = [c for c in courses if check_prerequisites(c, completed_courses)]
-    prereq_not_satisfied = [c for c in courses if not check_prerequisites(c, completed_courses)]
-    no_prereqs = [c for c in courses if not c.get('prerequisites') or (c.get('prerequisites') and c.get('prerequisites', '').strip() == '')]
-    
-    valid_combinations = []
-    
-    # STRATEGY 1: Build plans preferring courses with satisfied prerequisites or no prerequisites
-    # Combine satisfied + no prereqs for best options (remove duplicates by course ID)
-    preferred_course_ids = set()
-    preferred_courses = []
-    for c in prereq_satisfied + no_prereqs:
-        if c['id'] not in preferred_course_ids:
-            preferred_course_ids.add(c['id'])
-            preferred_courses.append(c)
-    
-    if len(preferred_courses) > 0:
-        for r in range(1, len(preferred_courses) + 1):
-            for combo in combinations(preferred_courses, r):
-                total = sum(c['credits'] for c in combo)
-                
-                # Check if this meets our credit target - EXACT MATCH ONLY
-                if total == target_credits:
-                    if min_credits <= total <= max_credits:
-                        valid_combinations.append({
-                            'courses': list(combo),
-                            'total_credits': total,
-                            'constraint_violations': 0,
-                            'all_prereqs_met': True
-                        })
-            
-            # Stop if we have enough plans
-            if len(valid_combinations) >= 50:
-                break
-    
-    # STRATEGY 2: If not enough plans, include courses with unmet prerequisites
-    # but mark them as having violations (to be replaced/warned)
-    if len(valid_combinations) < 10:
-        # Use ALL courses including those with unmet prerequisites
-        all_courses = courses
-        for r in range(1, min(len(all_courses) + 1, 16)):  # Limit to prevent explosion
-            for combo in combinations(all_courses, r):
-                total = sum(c['credits'] for c in combo)
-                
-                # Priority: Meet credit target EXACTLY
-                if total == target_credits:
-                    if min_credits <= total <= max_credits:
-                        # Check how many have prerequisites met
-                        prereq_met_count = sum(1 for c in combo if check_prerequisites(c, completed_courses))
-                        all_met = prereq_met_count == len(combo)
-                        
-                        valid_combinations.append({
-                            'courses': list(combo),
-                            'total_credits': total,
-                            'constraint_violations': len(combo) - prereq_met_count,
-                            'all_prereqs_met': all_met
-                        })
-            
-            # Stop if we have enough plans
-            if len(valid_combinations) >= 50:
-                break
-    
-    # Sort by: 1) All prerequisites met first, 2) Fewer violations, 3) Exact credit match
-    valid_combinations.sort(key=lambda x: (
-        not x['all_prereqs_met'],  # Prefer all prereqs met
-        x['constraint_violations'],  # Fewer violations better
-        abs(x['total_credits'] - target_credits)  # Exact match (should always be 0 now)
-    ))
+    if checker is None:
+        checker = PrerequisiteChecker(completed_courses)
     
-    return valid_combinations
+    course_set = SemesterCourses(courses, checker)
+    plans = csp_search(course_set, target_credits, min_credits, max_credits, **search_options)
+    return [course_set.materialize(mask, target_credits) for mask in plans]
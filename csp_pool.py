@@ -0,0 +1,114 @@
+import os
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from pipeline import rank_plans
+from serving import WorkerProcesses
+
+# PLANNER_CSP_WORKERS > 0 runs the plan search of semesters with at least
+# PLANNER_CSP_PARALLEL_MIN_COURSES courses in that many worker processes
+CSP_WORKERS = int(os.environ.get("PLANNER_CSP_WORKERS", "0"))
+CSP_PARALLEL_MIN_COURSES = int(os.environ.get("PLANNER_CSP_PARALLEL_MIN_COURSES", "20"))
+CSP_TIMEOUT = float(os.environ.get("PLANNER_CSP_TIMEOUT", "10.0"))
+
+def _rank_in_worker(course_set, target_credits, preference, top_n, min_credits, max_credits,
+                    deadline):
+    stats = {}
+    plans = rank_plans(course_set, target_credits, preference, top_n, stats=stats,
+                       min_credits=min_credits, max_credits=max_credits, deadline=deadline)
+    return plans, stats
+
+class CSPPool:
+    """
+    Runs whole plan searches (pipeline.rank_plans) in worker processes
+
+    The search is CPU-bound pure Python, so on a request thread one wide
+    semester holds the GIL against every other request. Here it runs in a
+    worker process while the request thread only waits. The worker gets the
+    request's deadline (time.monotonic() is system-wide) and, like the
+    in-thread search, returns the best plans found by then with
+    stats['deadline_hit'] set. A worker that has not answered `grace`
+    seconds after the deadline leaves the request with no plans and
+    deadline_hit. Semesters with fewer than `min_courses` courses are
+    searched in the calling thread, where the process round trip would cost
+    more than the search.
+    """
+
+    def __init__(self, workers=2, timeout=10.0, min_courses=20, grace=1.0):
+        self.workers = workers
+        self.timeout = timeout
+        self.min_courses = min_courses
+        self.grace = grace
+        self._processes = WorkerProcesses(workers)
+        self._lock = threading.Lock()
+        self.pooled_searches = 0
+        self.sequential_searches = 0
+        self.timeouts = 0
+
+    def rank(self, course_set, target_credits, preference, top_n=5, stats=None,
+             min_credits=11, max_credits=24, deadline=None):
+        """rank_plans() for one semester, in a worker process when it is wide enough"""
+        if stats is None:
+            stats = {}
+        if deadline is None:
+            deadline = time.monotonic() + self.timeout
+        if len(course_set) < self.min_courses:
+            with self._lock:
+                self.sequential_searches += 1
+            return rank_plans(course_set, target_credits, preference, top_n, stats=stats,
+                              min_credits=min_credits, max_credits=max_credits, deadline=deadline)
+
+        with self._lock:
+            self.pooled_searches += 1
+        future = self._processes.get().submit(_rank_in_worker, course_set, target_credits,
+                                              preference, top_n, min_credits, max_credits, deadline)
+        try:
+            plans, worker_stats = future.result(
+                timeout=max(0.0, deadline - time.monotonic()) + self.grace)
+        except FutureTimeout:
+            future.cancel()
+            with self._lock:
+                self.timeouts += 1
+            stats.update(levels=0, plans_scored=0, stopped_early=False, deadline_hit=True)
+            return []
+        except BrokenProcessPool:
+            # A worker died: start fresh ones next time
+            self._processes.discard()
+            raise
+        stats.update(worker_stats)
+        return plans
+
+    def shutdown(self):
+        self._processes.shutdown()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'min_courses': self.min_courses,
+                'pooled_searches': self.pooled_searches,
+                'sequential_searches': self.sequential_searches,
+                'timeouts': self.timeouts,
+            }
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_csp_pool():
+    """Process pool for plan searches, or None when PLANNER_CSP_WORKERS is 0"""
+    global _pool
+    if CSP_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = CSPPool(CSP_WORKERS, timeout=CSP_TIMEOUT, min_courses=CSP_PARALLEL_MIN_COURSES)
+        return _pool
+
+def rank_semester(course_set, target_credits, preference, stats=None, deadline=None):
+    """rank_plans() through the CSP pool when one is configured, else in this thread"""
+    pool = get_csp_pool()
+    if pool is None:
+        return rank_plans(course_set, target_credits, preference, stats=stats, deadline=deadline)
+    return pool.rank(course_set, target_credits, preference, stats=stats, deadline=deadline)
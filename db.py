@@ -0,0 +1,241 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+from catalog import DB_PATH, db_version
+from metrics import log
+from prereq_graph import ProgramGraph, load_graphs
+
+# PLANNER_CATALOG_JOURNAL_MODE=wal switches the catalog to WAL the first time
+# the pool opens it, so whatever rewrites a frequently changing catalog and
+# the readers here stop blocking each other. SQLite stores the mode in the
+# file; empty (the default) leaves it as the catalog build set it.
+CATALOG_JOURNAL_MODE = os.environ.get("PLANNER_CATALOG_JOURNAL_MODE", "")
+
+# The SQL text is kept constant so each pooled connection's statement cache
+# (sqlite3 `cached_statements`) reuses the prepared statements.
+DEPARTMENTS_SQL = "SELECT * FROM departments"
+
+PROGRAMS_SQL = "SELECT * FROM programs WHERE department_id = ?"
+
+COMPLETED_COURSES_SQL = """
+    SELECT DISTINCT c.id, c.code, c.name, c.description, c.credits, c.difficulty,
+           pc.semester, pc.prerequisites
+    FROM courses c
+    JOIN program_courses pc ON c.id = pc.course_id
+    WHERE pc.program_id = ? AND pc.semester < ?
+    ORDER BY pc.semester, c.code
+"""
+
+SEMESTER_COURSES_SQL = """
+    SELECT c.id, c.code, c.name, c.description, c.credits, c.difficulty,
+           pc.prerequisites
+    FROM courses c
+    JOIN program_courses pc ON c.id = pc.course_id
+    WHERE pc.program_id = ? AND pc.semester = ?
+    ORDER BY c.code
+"""
+
+class ConnectionPool:
+    """
+    Bounded pool of read-only SQLite connections shared by request threads
+
+    Connections are opened lazily up to `size` with query_only and mmap_size
+    pragmas. With `journal_mode` (e.g. "wal") the database is switched to it
+    once, before the first connection; otherwise the journal mode is left as
+    the catalog build set it. A checkout blocks for at most `timeout` seconds
+    when every connection is busy. Counters for checkouts, waits and query
+    time are available from stats(). A forked child starts with an empty
+    pool instead of the parent's connections.
+    """
+
+    def __init__(self, db_path=DB_PATH, size=4, timeout=5.0,
+                 mmap_size=64 * 1024 * 1024, cached_statements=64, journal_mode=None):
+        self.db_path = db_path
+        self.journal_mode = journal_mode
+        self._journal_mode_set = not journal_mode
+        self.size = size
+        self.timeout = timeout
+        self.mmap_size = mmap_size
+        self.cached_statements = cached_statements
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'wait_time': 0.0,
+            'queries': 0,
+            'query_time': 0.0,
+        }
+        ref = weakref.ref(self)
+        os.register_at_fork(after_in_child=lambda: ref() is not None and ref()._after_fork())
+
+    def _after_fork(self):
+        # SQLite connections must not be used across fork(): close the
+        # parent's idle ones and let the child open its own
+        idle, self._idle = self._idle, queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        while not idle.empty():
+            idle.get_nowait().close()
+
+    def _set_journal_mode(self):
+        # A separate, writable connection: the pooled ones are query_only
+        conn = sqlite3.connect(self.db_path)
+        try:
+            mode = conn.execute(f"PRAGMA journal_mode={self.journal_mode}").fetchone()[0]
+        finally:
+            conn.close()
+        if mode.lower() != self.journal_mode.lower():
+            log.warning("%s stays in journal mode %s (asked for %s)", self.db_path, mode,
+                        self.journal_mode)
+
+    def _connect(self):
+        if not self._journal_mode_set:
+            with self._lock:
+                if not self._journal_mode_set:
+                    self._set_journal_mode()
+                    self._journal_mode_set = True
+        conn = sqlite3.connect(self.db_path, check_same_thread=False,
+                               cached_statements=self.cached_statements)
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        conn.execute("PRAGMA query_only=ON")
+        return conn
+
+    def _checkout(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+        if create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        # Every connection is busy: wait for one to come back
+        start = time.perf_counter()
+        try:
+            conn = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No database connection available after {self.timeout}s")
+        finally:
+            with self._lock:
+                self._stats['waits'] += 1
+                self._stats['wait_time'] += time.perf_counter() - start
+        return conn
+
+    @contextmanager
+    def connection(self):
+        conn = self._checkout()
+        with self._lock:
+            self._stats['checkouts'] += 1
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def query(self, sql, params=()):
+        """Run a SELECT and return the rows as dicts"""
+        with self.connection() as conn:
+            start = time.perf_counter()
+            data = [dict(row) for row in conn.execute(sql, params).fetchall()]
+            elapsed = time.perf_counter() - start
+        with self._lock:
+            self._stats['queries'] += 1
+            self._stats['query_time'] += elapsed
+        return data
+
+    def stats(self):
+        with self._lock:
+            data = dict(self._stats)
+            data['connections'] = self._created
+        data['idle'] = self._idle.qsize()
+        data['size'] = self.size
+        return data
+
+    def close(self):
+        """Close every idle connection"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+class Database:
+    """
+    Catalog queries through a ConnectionPool
+
+    Same interface as catalog.Catalog, for deployments where the catalog
+    changes too often to keep an in-memory copy. Only the prerequisite
+    graphs are kept, per program, until the DB file's mtime changes.
+    """
+
+    def __init__(self, pool=None):
+        self.pool = pool or ConnectionPool(journal_mode=CATALOG_JOURNAL_MODE or None)
+        self._graph_lock = threading.Lock()
+        self._graphs = {}
+        self._graphs_version = None
+
+    def version(self):
+        """catalog.db_version(): changes whenever the catalog is rewritten"""
+        return db_version(self.pool.db_path)
+
+    def departments(self):
+        return self.pool.query(DEPARTMENTS_SQL)
+
+    def programs(self, dept_id):
+        return self.pool.query(PROGRAMS_SQL, (dept_id,))
+
+    def courses_for_semester(self, program_id, semester):
+        return self.pool.query(SEMESTER_COURSES_SQL, (program_id, semester))
+
+    def completed_courses(self, program_id, current_semester):
+        """All courses from semesters before current_semester"""
+        if current_semester <= 1:
+            return []
+        return self.pool.query(COMPLETED_COURSES_SQL, (program_id, current_semester))
+
+    def prerequisite_graph(self, program_id):
+        """
+        ProgramGraph of the program's prerequisites, loaded and validated once
+        per program and DB mtime; raises PrerequisiteGraphError for invalid ones
+        """
+        version = self.version()
+        with self._graph_lock:
+            if version != self._graphs_version:
+                self._graphs = {}
+                self._graphs_version = version
+            cached = self._graphs.get(program_id)
+        if cached is None:
+            errors = {}
+            with self.pool.connection() as conn:
+                graphs = load_graphs(conn, program_id, errors)
+            cached = errors.get(program_id) or graphs.get(program_id) or ProgramGraph(program_id)
+            with self._graph_lock:
+                if version == self._graphs_version:
+                    self._graphs[program_id] = cached
+        if isinstance(cached, Exception):
+            raise cached
+        return cached
+
+    def stats(self):
+        return self.pool.stats()
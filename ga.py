@@ -1,3 +1,44 @@
+import heapq
+import os
+import random
+import time
+from itertools import islice
+from operator import itemgetter
+
+# NumPy is optional and only fitness_batch needs it; it takes longer to
+# import than the rest of the planner, so load_numpy() imports it on first use
+np = None
+_numpy_checked = False
+
+def load_numpy():
+    """The numpy module, imported on first call; None if it is not installed"""
+    global np, _numpy_checked
+    if not _numpy_checked:
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            pass
+        _numpy_checked = True
+    return np
+
+# Points per course for each difficulty code, by preference (see fitness)
+PREFERENCE_WEIGHTS = {
+    "Easy": [3, 1, 0],
+    "Balanced": [2, 3, 2],
+}
+DEFAULT_WEIGHTS = [0, 1, 3]  # Challenging
+
+# Semesters with at least this many courses are ranked by evolve() instead of
+# only re-sorting the (capped) CSP candidates
+EVOLVE_MIN_COURSES = int(os.environ.get("PLANNER_GA_MIN_COURSES", "20"))
+# evolve()'s population; it is also as many seed plans as evolve() can use
+EVOLVE_POPULATION = 40
+
+# top_plans scores chunks of this many plans with fitness_batch (if NumPy is
+# installed); for fewer plans the per-plan loop is faster
+BATCH_MIN_PLANS = int(os.environ.get("PLANNER_BATCH_MIN_PLANS", "256"))
+
 def fitness(plan, preference, target_credits):
     """
     Calculate fitness score for a complete plan
@@ -74,17 +115,256 @@ def optimize(plans, preference, target_credits):
     if not plans:
         return []
     
-    # Score each plan
-    scored_plans = []
-    for plan in plans:
-        score = fitness(plan, preference, target_credits)
-        scored_plans.append({
-            'plan': plan,
-            'fitness': score
-        })
+    # Keep only the 5 best in a bounded heap (stable: ties keep input order)
+    return heapq.nlargest(5, plans, key=lambda plan: fitness(plan, preference, target_credits))
+
+def fitness_mask(course_set, mask, preference, target_credits, total_credits=None):
+    """
+    Same score as fitness() for a plan given as a SemesterCourses bitmask
+    
+    Counts come from popcounts against the table's masks, so no plan dict or
+    course list is built per candidate.
+    """
+    if total_credits is None:
+        total_credits = course_set.total_credits(mask)
+    
+    violations = course_set.violations(mask)
+    prereq_bonus = 100 if violations == 0 else -violations * 50
+    
+    if total_credits != target_credits:
+        credit_penalty = abs(total_credits - target_credits) * 1000
+    else:
+        credit_penalty = 0
+    
+    easy_mask, balanced_mask, hard_mask = course_set.difficulty_masks
+    easy = (mask & easy_mask).bit_count()
+    balanced = (mask & balanced_mask).bit_count()
+    hard = (mask & hard_mask).bit_count()
+    w_easy, w_balanced, w_hard = PREFERENCE_WEIGHTS.get(preference, DEFAULT_WEIGHTS)
+    difficulty_score = easy * w_easy + balanced * w_balanced + hard * w_hard
+    
+    balance_bonus = ((easy > 0) + (balanced > 0) + (hard > 0)) * 2
+    efficiency_bonus = (20 - (easy + balanced + hard)) * 0.5
+    
+    return prereq_bonus + difficulty_score - credit_penalty + balance_bonus + efficiency_bonus
+
+def plan_matrix(course_set, plans):
+    """Plan x course 0/1 membership array for a list of bitmasks"""
+    np = load_numpy()
+    n = len(course_set)
+    width = max(1, (n + 7) // 8)
+    raw = b''.join(mask.to_bytes(width, 'little') for mask in plans)
+    bits = np.unpackbits(np.frombuffer(raw, dtype=np.uint8).reshape(len(plans), width),
+                         axis=1, bitorder='little')
+    return bits[:, :n]
+
+def fitness_batch(course_set, plans, preference, target_credits):
+    """
+    fitness() for many plans at once, vectorized with NumPy
+    
+    plans is a list of bitmasks or a (plans x courses) membership array.
+    Credits, the unmet-prerequisite flags and the difficulty one-hot matrix
+    are per-course vectors, so every factor is one matrix product or
+    elementwise op over all plans. Returns a float array equal to the scalar
+    fitness of each plan.
+    """
+    np = load_numpy()
+    if np is None:
+        raise ImportError("fitness_batch requires NumPy")
+    
+    membership = plans if isinstance(plans, np.ndarray) else plan_matrix(course_set, plans)
+    membership = membership.astype(np.int64, copy=False)
+    
+    credits = np.asarray(course_set.credits, dtype=np.int64)
+    unmet = np.asarray([not met for met in course_set.prereq_met], dtype=np.int64)
+    one_hot = np.zeros((len(course_set), 3), dtype=np.int64)
+    one_hot[np.arange(len(course_set)), course_set.difficulty] = 1
+    weights = np.asarray(PREFERENCE_WEIGHTS.get(preference, DEFAULT_WEIGHTS), dtype=np.int64)
+    
+    total_credits = membership @ credits
+    violations = membership @ unmet
+    counts = membership @ one_hot
+    
+    prereq_bonus = np.where(violations == 0, 100, -violations * 50)
+    credit_penalty = np.abs(total_credits - target_credits) * 1000
+    difficulty_score = counts @ weights
+    balance_bonus = (counts > 0).sum(axis=1) * 2
+    efficiency_bonus = (20 - counts.sum(axis=1)) * 0.5
+    
+    return prereq_bonus + difficulty_score - credit_penalty + balance_bonus + efficiency_bonus
+
+def score_stream(course_set, plans, preference, target_credits):
+    """
+    Yield (fitness, mask) for an iterable of plans hitting target_credits
+    
+    Plans are pulled in chunks; chunks of BATCH_MIN_PLANS or more are scored
+    with fitness_batch when NumPy is available.
+    """
+    chunk_size = max(BATCH_MIN_PLANS, 1)
+    iterator = iter(plans)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        if len(chunk) >= BATCH_MIN_PLANS and load_numpy() is not None:
+            scores = fitness_batch(course_set, chunk, preference, target_credits).tolist()
+        else:
+            scores = [fitness_mask(course_set, mask, preference, target_credits, target_credits)
+                      for mask in chunk]
+        yield from zip(scores, chunk)
+
+def top_plans(course_set, plans, preference, target_credits, top_n=5):
+    """
+    Streaming top-k ranking of bitmask plans
     
-    # Sort by fitness (descending)
-    scored_plans.sort(key=lambda x: x['fitness'], reverse=True)
+    plans can be any iterable (e.g. csp.iter_plans); only a bounded heap of
+    top_n plans is kept, so memory is O(top_n) however many plans the search
+    finds.
     
-    # Return top 5 plans
-    return [sp['plan'] for sp in scored_plans[:5]]
+    Order: higher fitness first, then fewer violations, then the order the
+    plans arrived in (heapq.nlargest is stable), which is the same order as
+    sorting csp_search's list by fitness.
+    """
+    scored = (((score, -course_set.violations(mask)), mask)
+              for score, mask in score_stream(course_set, plans, preference, target_credits))
+    return [mask for _, mask in heapq.nlargest(top_n, scored, key=itemgetter(0))]
+
+def optimize_masks(course_set, plans, preference, target_credits, top_n=5):
+    """
+    optimize() for bitmask plans from csp.csp_search
+    Returns the top_n masks sorted by fitness
+    """
+    return top_plans(course_set, plans, preference, target_credits, top_n)
+
+def repair(course_set, mask, target_credits, rng):
+    """
+    Turn any course subset into one with EXACTLY target_credits
+
+    Drops random courses until the plan is not over target, then fills the gap
+    with unused courses chosen through a suffix reachability bitset. If the
+    gap cannot be filled, another kept course is dropped and the fill retried.
+    Returns None only when no subset of the semester hits the target.
+    """
+    credits = course_set.credits
+    kept = course_set.indices(mask)
+    rng.shuffle(kept)
+    total = sum(credits[i] for i in kept)
+    while total > target_credits:
+        total -= credits[kept.pop()]
+
+    while True:
+        gap = target_credits - total
+        if gap == 0:
+            break
+        used = set(kept)
+        free = [i for i in range(len(credits)) if i not in used]
+        rng.shuffle(free)
+
+        # reach[j] has bit s set when some subset of free[j:] sums to s
+        reach = [0] * (len(free) + 1)
+        reach[len(free)] = 1
+        for j in range(len(free) - 1, -1, -1):
+            reach[j] = reach[j + 1] | (reach[j + 1] << credits[free[j]])
+
+        if (reach[0] >> gap) & 1:
+            for j, i in enumerate(free):
+                if gap == 0:
+                    break
+                # Take free[j] when the rest can still close the remaining gap
+                if credits[i] <= gap and (reach[j + 1] >> (gap - credits[i])) & 1:
+                    kept.append(i)
+                    gap -= credits[i]
+            break
+
+        if not kept:
+            return None
+        total -= credits[kept.pop()]
+
+    result = 0
+    for i in kept:
+        result |= 1 << i
+    return result
+
+def evolve(course_set, target_credits, preference, population_size=EVOLVE_POPULATION, generations=80,
+           crossover_rate=0.9, mutation_rate=0.1, tournament_size=3, elite=2,
+           patience=15, seed=None, seed_plans=None, top_n=5, deadline=None):
+    """
+    Genetic algorithm over course subsets (bitmasks of a SemesterCourses)
+
+    Each generation uses tournament selection, uniform crossover and bit-flip
+    mutation, then repairs every child to the exact credit target, so all
+    individuals are feasible. Runs at most `generations` generations and
+    stops early once the best fitness has not improved for `patience`
+    generations. seed_plans (e.g. csp_search results) join the initial
+    population. The same seed gives the same result. Once time.monotonic()
+    passes `deadline` no further generation starts.
+
+    Returns the top_n distinct masks seen, best first. Ties are broken like
+    csp_search's order (fewer courses, then lowest course indices).
+    """
+    rng = random.Random(seed)
+    n = len(course_set)
+    if n == 0:
+        return []
+
+    scores = {}
+
+    def score(mask):
+        value = scores.get(mask)
+        if value is None:
+            value = fitness_mask(course_set, mask, preference, target_credits, target_credits)
+            scores[mask] = value
+        return value
+
+    population = []
+    for mask in (seed_plans or [])[:population_size]:
+        if course_set.total_credits(mask) == target_credits:
+            population.append(mask)
+    attempts = 0
+    while len(population) < population_size and attempts < population_size * 4:
+        attempts += 1
+        mask = repair(course_set, rng.getrandbits(n), target_credits, rng)
+        if mask is None:
+            return []  # No subset hits the target at all
+        population.append(mask)
+
+    def tournament():
+        best = None
+        for _ in range(tournament_size):
+            candidate = population[rng.randrange(len(population))]
+            if best is None or score(candidate) > score(best):
+                best = candidate
+        return best
+
+    full = (1 << n) - 1
+    best_fitness = max(score(m) for m in population)
+    stale = 0
+    for _ in range(generations):
+        if deadline is not None and time.monotonic() > deadline:
+            break
+        ranked = sorted(population, key=score, reverse=True)
+        next_population = ranked[:elite]
+        while len(next_population) < population_size:
+            child = tournament()
+            if rng.random() < crossover_rate:
+                crossover_mask = rng.getrandbits(n)
+                child = (child & crossover_mask) | (tournament() & ~crossover_mask & full)
+            for i in range(n):
+                if rng.random() < mutation_rate:
+                    child ^= 1 << i
+            child = repair(course_set, child, target_credits, rng)
+            if child is not None:
+                next_population.append(child)
+        population = next_population
+
+        generation_best = max(score(m) for m in population)
+        if generation_best > best_fitness:
+            best_fitness = generation_best
+            stale = 0
+        else:
+            stale += 1
+            if stale >= patience:
+                break
+
+    ranked = sorted(scores, key=lambda m: (-scores[m], m.bit_count(), course_set.indices(m)))
+    return ranked[:top_n]
@@ -0,0 +1,201 @@
+"""
+Synthetic course catalogs in the university.db schema, for scale testing
+
+    python generate_catalog.py --db large.db --departments 20 --programs 5 \\
+        --courses-per-semester 40 --prereq-density 0.2 --credits 2:1,3:3,4:1
+
+Everything is derived from the parameters and --seed, and the tables are
+cleared and refilled in one transaction, so re-running a command always
+leaves the same catalog behind. Point the planner at the result with
+catalog.Catalog(path) or by copying it over university.db.
+"""
+import argparse
+import random
+import sqlite3
+import time
+
+from catalog import DB_PATH
+from prereq_graph import migrate
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS departments (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS programs (
+        id INTEGER PRIMARY KEY,
+        department_id INTEGER NOT NULL,
+        name TEXT NOT NULL UNIQUE,
+        FOREIGN KEY (department_id) REFERENCES departments(id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS courses (
+        id INTEGER PRIMARY KEY,
+        code TEXT NOT NULL UNIQUE,
+        name TEXT NOT NULL,
+        description TEXT,
+        credits INTEGER NOT NULL,
+        difficulty TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS program_courses (
+        id INTEGER PRIMARY KEY,
+        program_id INTEGER NOT NULL,
+        course_id INTEGER NOT NULL,
+        semester INTEGER NOT NULL,
+        prerequisites TEXT,
+        UNIQUE(program_id, course_id, semester),
+        FOREIGN KEY (program_id) REFERENCES programs(id),
+        FOREIGN KEY (course_id) REFERENCES courses(id)
+    )
+    """,
+    # Covering index for the per-semester lookups (semester = ? and semester < ?):
+    # the join key and the prerequisites come from the index, not the table
+    """
+    CREATE INDEX IF NOT EXISTS idx_program_courses_program_semester
+    ON program_courses (program_id, semester, course_id, prerequisites)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_programs_department
+    ON programs (department_id)
+    """,
+]
+
+# Same mix as create_db_new.py's credit cycle (2, 3, 3, 3, 4)
+DEFAULT_CREDIT_WEIGHTS = {2: 1, 3: 3, 4: 1}
+DIFFICULTIES = ["Easy", "Balanced", "Challenging"]
+
+def create_schema(conn):
+    """Create the catalog tables and indexes that do not exist yet"""
+    for statement in SCHEMA:
+        conn.execute(statement)
+
+def parse_credit_weights(text):
+    """'2:1,3:3,4:1' -> {2: 1, 3: 3, 4: 1}"""
+    weights = {}
+    for part in text.split(','):
+        credits, _, weight = part.partition(':')
+        weights[int(credits)] = float(weight) if weight else 1.0
+    return weights
+
+def generate_rows(departments=6, programs_per_department=4, courses_per_semester=11,
+                  semesters=8, prereq_density=0.15, max_prereqs=2, credit_weights=None, seed=0):
+    """
+    Rows for the four catalog tables: (departments, programs, courses, program_courses)
+
+    Each department has a pool of courses_per_semester x semesters courses.
+    Every program takes the whole pool in its own shuffled order, so each
+    course appears once per program and programs of a department share
+    courses in different semesters. A course from semester 2 on has
+    prerequisites with probability prereq_density: 1..max_prereqs courses the
+    same program schedules in earlier semesters, so the prerequisite graph is
+    acyclic and every plan can be satisfied.
+    """
+    rng = random.Random(seed)
+    credit_weights = credit_weights or DEFAULT_CREDIT_WEIGHTS
+    credit_values = list(credit_weights)
+    credit_probs = [credit_weights[c] for c in credit_values]
+
+    department_rows, program_rows, course_rows, mapping_rows = [], [], [], []
+    pool_size = courses_per_semester * semesters
+    for d in range(1, departments + 1):
+        prefix = f"D{d:02d}"
+        department_rows.append((d, f"Department {d}"))
+
+        pool = []
+        for i in range(1, pool_size + 1):
+            course_id = len(course_rows) + 1
+            code = f"{prefix}{i:04d}"
+            name = f"{prefix} Course {i}"
+            course_rows.append((course_id, code, name, f"{name} course content",
+                                rng.choices(credit_values, credit_probs)[0], rng.choice(DIFFICULTIES)))
+            pool.append((course_id, code))
+
+        for p in range(1, programs_per_department + 1):
+            program_id = len(program_rows) + 1
+            program_rows.append((program_id, d, f"{prefix}-P{p}"))
+            order = list(pool)
+            rng.shuffle(order)
+            earlier = []
+            for semester in range(1, semesters + 1):
+                block = order[(semester - 1) * courses_per_semester:semester * courses_per_semester]
+                for course_id, code in block:
+                    prereqs = None
+                    if earlier and rng.random() < prereq_density:
+                        count = rng.randint(1, min(max_prereqs, len(earlier)))
+                        prereqs = ",".join(sorted(rng.sample(earlier, count)))
+                    mapping_rows.append((len(mapping_rows) + 1, program_id, course_id, semester, prereqs))
+                earlier.extend(code for _, code in block)
+
+    return department_rows, program_rows, course_rows, mapping_rows
+
+def generate_catalog(db_path, **options):
+    """
+    Replace the catalog in db_path with a generated one (see generate_rows)
+    Returns a dict of row counts
+    """
+    department_rows, program_rows, course_rows, mapping_rows = generate_rows(**options)
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            create_schema(conn)
+            for table in ("program_courses", "courses", "programs", "departments"):
+                conn.execute(f"DELETE FROM {table}")
+            conn.executemany("INSERT INTO departments VALUES (?, ?)", department_rows)
+            conn.executemany("INSERT INTO programs VALUES (?, ?, ?)", program_rows)
+            conn.executemany("INSERT INTO courses VALUES (?, ?, ?, ?, ?, ?)", course_rows)
+            conn.executemany("INSERT INTO program_courses VALUES (?, ?, ?, ?, ?)", mapping_rows)
+        edges = migrate(conn)
+    finally:
+        conn.close()
+    return {
+        'departments': len(department_rows),
+        'programs': len(program_rows),
+        'courses': len(course_rows),
+        'program_courses': len(mapping_rows),
+        'prerequisite_edges': edges,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic course catalog")
+    parser.add_argument('--db', required=True,
+                        help=f"SQLite file to (re)fill; pass {DB_PATH} only to replace the shipped catalog")
+    parser.add_argument('--departments', type=int, default=6)
+    parser.add_argument('--programs', type=int, default=4, help="programs per department")
+    parser.add_argument('--courses-per-semester', type=int, default=11)
+    parser.add_argument('--semesters', type=int, default=8)
+    parser.add_argument('--prereq-density', type=float, default=0.15,
+                        help="share of courses (semester 2+) with prerequisites")
+    parser.add_argument('--max-prereqs', type=int, default=2)
+    parser.add_argument('--credits', default="2:1,3:3,4:1", help="credit:weight pairs")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    counts = generate_catalog(
+        args.db,
+        departments=args.departments,
+        programs_per_department=args.programs,
+        courses_per_semester=args.courses_per_semester,
+        semesters=args.semesters,
+        prereq_density=args.prereq_density,
+        max_prereqs=args.max_prereqs,
+        credit_weights=parse_credit_weights(args.credits),
+        seed=args.seed,
+    )
+    elapsed = time.perf_counter() - start
+
+    print(f"✅ Catalog generated in {args.db}")
+    print(f"   Departments: {counts['departments']}, Programs: {counts['programs']}")
+    print(f"   Courses: {counts['courses']}")
+    print(f"   Program-Course Mappings: {counts['program_courses']}")
+    print(f"   Prerequisite Edges: {counts['prerequisite_edges']}")
+    print(f"   Build time: {elapsed:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# PLANNER_LOG_LEVEL=DEBUG brings back the per-request trace of the planning
+# steps; at the default WARNING level those log calls return immediately
+LOG_LEVEL = os.environ.get("PLANNER_LOG_LEVEL", "WARNING").upper()
+
+log = logging.getLogger("planner")
+
+def configure_logging(level=None):
+    """Send planner logs to stderr at `level` (default PLANNER_LOG_LEVEL)"""
+    level = level or LOG_LEVEL
+    if not log.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(levelname)s: %(message)s"))
+        log.addHandler(handler)
+        log.propagate = False
+    log.setLevel(level)
+
+# Upper bounds (seconds) of the latency buckets, Prometheus' defaults plus
+# a few sub-millisecond ones for the cached paths
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Plans per search
+COUNT_BUCKETS = (1, 10, 100, 1000, 10000, 100000, 1000000)
+
+class Histogram:
+    """
+    Thread-safe cumulative histogram in the Prometheus sense: per-label-set
+    bucket counts, a sum and a count
+    """
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self):
+        """{label values: (cumulative bucket counts, sum, count)}"""
+        with self._lock:
+            result = {}
+            for key, (counts, total, count) in self._series.items():
+                cumulative, running = [], 0
+                for c in counts:
+                    running += c
+                    cumulative.append(running)
+                result[key] = (cumulative, total, count)
+            return result
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, (cumulative, total, count) in sorted(self.snapshot().items()):
+            for bound, value in zip(self.buckets, cumulative):
+                lines.append(f"{self.name}_bucket{_labels(self.labels, key, ('le', _number(bound)))} {value}")
+            lines.append(f"{self.name}_bucket{_labels(self.labels, key, ('le', '+Inf'))} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {count}")
+        return lines
+
+class Counter:
+    """Thread-safe counter per label set"""
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labels, key)} {_number(value)}")
+        return lines
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def _labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+stage_seconds = Histogram("planner_stage_seconds", "Time spent in each planning stage", ("stage",))
+search_plans = Histogram("planner_search_plans", "Exact-credit plans the CSP search produced per search",
+                         buckets=COUNT_BUCKETS)
+search_levels = Histogram("planner_search_levels", "Search levels (strategy, size) explored per search",
+                          buckets=COUNT_BUCKETS)
+search_outcomes = Counter("planner_search_outcomes_total",
+                          "Searches by how they ended (complete, stopped_early, deadline)", ("outcome",))
+request_seconds = Histogram("planner_request_seconds", "API request latency", ("endpoint", "status"))
+
+METRICS = [stage_seconds, search_plans, search_levels, search_outcomes, request_seconds]
+
+@contextmanager
+def timer(stage):
+    """Record the time spent in the with-block under planner_stage_seconds{stage=...}"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_seconds.observe(time.perf_counter() - start, stage)
+
+def record_search(stats):
+    """Record one rank_plans() search from its stats dict"""
+    search_plans.observe(stats.get('plans_scored', 0))
+    search_levels.observe(stats.get('levels', 0))
+    if stats.get('deadline_hit'):
+        outcome = 'deadline'
+    elif stats.get('stopped_early'):
+        outcome = 'stopped_early'
+    else:
+        outcome = 'complete'
+    search_outcomes.inc(outcome)
+
+def gauge_lines(name, help_text, values, label=None):
+    """Prometheus gauge lines for {label value: number} (or one number)"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+    if label is None:
+        lines.append(f"{name} {_number(values)}")
+    else:
+        for key, value in sorted(values.items()):
+            lines.append(f"{name}{_labels((label,), (key,))} {_number(value)}")
+    return lines
+
+def render(extra_lines=()):
+    """Prometheus text exposition of every metric (plus extra_lines)"""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    lines.extend(extra_lines)
+    return "\n".join(lines) + "\n"
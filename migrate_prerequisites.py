@@ -0,0 +1,24 @@
+import sqlite3
+import sys
+import time
+
+from catalog import DB_PATH
+from prereq_graph import PrerequisiteGraphError, migrate
+
+db_path = sys.argv[1] if len(sys.argv) > 1 else DB_PATH
+
+start = time.perf_counter()
+conn = sqlite3.connect(db_path)
+try:
+    edges = migrate(conn)
+except PrerequisiteGraphError as e:
+    print(f"❌ Prerequisites not migrated: {e}")
+    sys.exit(1)
+finally:
+    conn.close()
+elapsed = time.perf_counter() - start
+
+print(f"✅ Prerequisite graph migrated successfully!")
+print(f"   File: {db_path}")
+print(f"   Edges: {edges}")
+print(f"   Build time: {elapsed:.1f}s")
@@ -0,0 +1,196 @@
+import heapq
+import time
+from itertools import islice
+
+from csp import iter_plan_levels
+from ga import (DEFAULT_WEIGHTS, EVOLVE_MIN_COURSES, EVOLVE_POPULATION, PREFERENCE_WEIGHTS, evolve,
+                score_stream)
+from metrics import log, timer
+from prolog_interface import get_advice
+
+def fitness_upper_bound(course_set, pool, sizes, preference, min_violations):
+    """
+    Highest fitness any exact-credit plan with one of `sizes` courses from
+    `pool` (and at least min_violations violations) could score
+    """
+    if not sizes:
+        return float('-inf')
+    weights = PREFERENCE_WEIGHTS.get(preference, DEFAULT_WEIGHTS)
+    course_weights = sorted((weights[course_set.difficulty[i]] for i in pool), reverse=True)
+    best_weights = [0]
+    for w in course_weights:
+        best_weights.append(best_weights[-1] + w)
+    distinct = len(set(course_set.difficulty[i] for i in pool))
+    prereq_bonus = 100 if min_violations == 0 else -min_violations * 50
+    return max(prereq_bonus + best_weights[min(r, len(course_weights))] + min(r, distinct) * 2
+               + (20 - r) * 0.5 for r in sizes)
+
+def max_challenging(limit):
+    """Filter: at most `limit` Challenging courses per plan"""
+    def keep(course_set, mask):
+        return course_set.difficulty_counts(mask)[2] <= limit
+    return keep
+
+def filter_stage(course_set, masks, filters):
+    """Only the plans every filter(course_set, mask) accepts"""
+    for mask in masks:
+        if all(f(course_set, mask) for f in filters):
+            yield mask
+
+def until_deadline(masks, deadline, stats, every=64):
+    """Stop a mask stream once time.monotonic() passes deadline (checked every few plans)"""
+    for count, mask in enumerate(masks):
+        if count % every == 0 and time.monotonic() > deadline:
+            stats['deadline_hit'] = True
+            return
+        yield mask
+
+def rank_stage(course_set, levels, preference, target_credits, top_n=5, filters=(),
+               max_courses=15, stats=None, deadline=None):
+    """
+    Streaming top-k over csp.iter_plan_levels()
+
+    Plans are scored as the search finds them and only a heap of top_n is
+    kept. Before each level the best fitness that level (or any later one)
+    could reach is bounded; once that bound is below the current top_n-th
+    score the result is final and the search is abandoned. The order matches
+    ga.top_plans: fitness, then fewer violations, then search order.
+    
+    With a `deadline` (time.monotonic() value) the search also stops when it
+    passes, returning the best plans scored so far and setting
+    stats['deadline_hit'].
+    """
+    if stats is None:
+        stats = {}
+    stats.setdefault('levels', 0)
+    stats.setdefault('plans_scored', 0)
+    stats['stopped_early'] = False
+    stats['deadline_hit'] = False
+
+    # Strategy 2 may still run after Strategy 1; bound it once
+    n = len(course_set)
+    strategy2_bound = fitness_upper_bound(course_set, range(n), range(1, min(n, max_courses) + 1),
+                                          preference, 1)
+
+    heap = []
+    seq = 0
+    for level in levels:
+        if len(heap) == top_n:
+            bound = fitness_upper_bound(course_set, level.pool, level.sizes, preference,
+                                        level.min_violations)
+            if level.strategy == 1:
+                bound = max(bound, strategy2_bound)
+            if bound < heap[0][0][0]:
+                stats['stopped_early'] = True
+                break
+
+        stats['levels'] += 1
+        masks = level.masks
+        if deadline is not None:
+            masks = until_deadline(masks, deadline, stats)
+        if filters:
+            masks = filter_stage(course_set, masks, filters)
+        for score, mask in score_stream(course_set, masks, preference, target_credits):
+            stats['plans_scored'] += 1
+            # -seq: among equal keys the plan found first wins
+            item = ((score, -course_set.violations(mask), -seq), mask)
+            seq += 1
+            if len(heap) < top_n:
+                heapq.heappush(heap, item)
+            elif item[0] > heap[0][0]:
+                heapq.heapreplace(heap, item)
+        # The level may also have ended early inside the search itself
+        if deadline is not None and time.monotonic() > deadline:
+            stats['deadline_hit'] = True
+        if stats['deadline_hit']:
+            break
+
+    return [mask for _, mask in sorted(heap, reverse=True)]
+
+def rank_plans(course_set, target_credits, preference, top_n=5, filters=(), stats=None,
+               min_credits=11, max_credits=24, deadline=None, **search_options):
+    """
+    CSP search + GA ranking for one semester; returns the top plan bitmasks
+
+    Wide semesters (ga.EVOLVE_MIN_COURSES) go through ga.evolve seeded with the
+    first EVOLVE_POPULATION CSP plans (the most it can use), so the CSP search
+    stops there instead of enumerating the semester; filters only apply to
+    those seeds and the final result. `deadline` bounds both paths (see
+    rank_stage).
+    """
+    if stats is None:
+        stats = {}
+    levels = iter_plan_levels(course_set, target_credits, min_credits, max_credits,
+                              deadline=deadline, **search_options)
+    if len(course_set) >= EVOLVE_MIN_COURSES:
+        stats['deadline_hit'] = False
+        stats['levels'] = stats['plans_scored'] = 0
+
+        def seed_stream():
+            for level in levels:
+                stats['levels'] += 1
+                for mask in level.masks:
+                    stats['plans_scored'] += 1
+                    yield mask
+
+        seeds = seed_stream()
+        if deadline is not None:
+            seeds = until_deadline(seeds, deadline, stats)
+        seeds = list(islice(filter_stage(course_set, seeds, filters), EVOLVE_POPULATION))
+        plans = []
+        if seeds:
+            plans = evolve(course_set, target_credits, preference, seed=0, seed_plans=seeds,
+                           top_n=top_n * 4 if filters else top_n, deadline=deadline)
+        if deadline is not None and time.monotonic() > deadline:
+            stats['deadline_hit'] = True
+        return list(filter_stage(course_set, plans, filters))[:top_n]
+    return rank_stage(course_set, levels, preference, target_credits, top_n, filters,
+                      search_options.get('max_courses', 15), stats, deadline)
+
+def advice_stage(course_set, masks, cgpa, target_credits, semester):
+    """
+    Expert-system step: yields the serialized plan (with advice) for each
+    mask, materializing course dicts only here
+    """
+    for mask in masks:
+        plan = course_set.materialize(mask, target_credits)
+
+        # Verify exact credit match (should always be true)
+        if plan['total_credits'] != target_credits:
+            log.warning("Plan has %s credits, expected %s", plan['total_credits'], target_credits)
+            continue  # Skip plans that don't match exactly
+
+        with timer('advice'):
+            advice = get_advice(cgpa, plan['courses'])
+
+        # Add prerequisite warning if any violations exist
+        if not plan.get('all_prereqs_met', True):
+            violations = plan.get('constraint_violations', 0)
+            prereq_warning = f"⚠️ NOTE: {violations} course(s) in this plan have unmet prerequisites. Alternative courses were selected to meet your EXACT {target_credits} credit requirement."
+            if 'warnings' not in advice:
+                advice['warnings'] = []
+            advice['warnings'].insert(0, prereq_warning)
+        else:
+            # Add confirmation that credits are exact
+            if 'advice' not in advice:
+                advice['advice'] = []
+            advice['advice'].insert(0, f"✓ This plan provides EXACTLY {target_credits} credits as requested")
+
+        yield {
+            'total_credits': plan['total_credits'],
+            'course_count': len(plan['courses']),
+            'all_prereqs_met': plan.get('all_prereqs_met', True),
+            'courses': [
+                {
+                    'code': c['code'],
+                    'name': c['name'],
+                    'description': c['description'],
+                    'credits': c['credits'],
+                    'difficulty': c['difficulty'],
+                    'semester': semester,
+                    'prerequisites': c['prerequisites']
+                }
+                for c in plan['courses']
+            ],
+            'expert_advice': advice  # Prolog-based advice
+        }
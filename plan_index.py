@@ -0,0 +1,291 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import weakref
+
+from catalog import DB_PATH, Catalog, db_version
+from course_set import SemesterCourses
+from metrics import log
+from pipeline import rank_plans
+from prereq_graph import PrerequisiteGraphError
+
+INDEX_PATH = "plan_index.db"
+
+# Bump when the search or ranking changes so old indexes are rebuilt
+INDEX_VERSION = 2
+
+PREFERENCES = ["easy", "balanced", "challenging"]
+CREDIT_RANGE = range(11, 25)
+SEMESTERS = range(1, 9)
+TOP_N = 5
+
+FINGERPRINT_SQL = """
+    SELECT pc.program_id, pc.semester, c.id, c.code, c.credits, c.difficulty,
+           pc.prerequisites
+    FROM courses c
+    JOIN program_courses pc ON c.id = pc.course_id
+    ORDER BY pc.program_id, pc.semester, c.code
+"""
+
+# The normalized edges too (prereq_graph.migrate), when the catalog has them
+PREREQUISITE_FINGERPRINT_SQL = """
+    SELECT program_id, semester, course_id, prerequisite_id FROM prerequisite_edges
+    ORDER BY program_id, semester, course_id, prerequisite_id
+"""
+
+# A build holds <index_path>.lock, so one process rebuilds while the others
+# (e.g. every gunicorn worker) keep answering from the live search. A lock
+# not refreshed for PLANNER_INDEX_LOCK_STALE seconds was left by a crashed
+# build and is taken over; PlanIndex checks a held lock again every
+# REBUILD_RETRY seconds.
+LOCK_STALE = float(os.environ.get("PLANNER_INDEX_LOCK_STALE", "600"))
+REBUILD_RETRY = 5.0
+
+LOOKUP_SQL = """
+    SELECT plans FROM plan_index
+    WHERE program_id = ? AND semester = ? AND target_credits = ? AND preference = ?
+"""
+
+def catalog_fingerprint(db_path=DB_PATH):
+    """Hash of everything the plan search reads from the catalog"""
+    digest = hashlib.sha256(f"plan-index-v{INDEX_VERSION}".encode())
+    conn = sqlite3.connect(db_path)
+    try:
+        for row in conn.execute(FINGERPRINT_SQL):
+            digest.update(repr(row).encode())
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'prerequisite_edges'").fetchone():
+            digest.update(b"edges")
+            for row in conn.execute(PREREQUISITE_FINGERPRINT_SQL):
+                digest.update(repr(row).encode())
+    finally:
+        conn.close()
+    return digest.hexdigest()
+
+def rank_key(catalog, program_id, semester, target_credits, preference):
+    """Top plan bitmasks for one key (same steps as app.api_plan)"""
+    courses = catalog.courses_for_semester(program_id, semester)
+    completed = catalog.completed_courses(program_id, semester)
+    checker = catalog.prerequisite_graph(program_id).checker(semester, (c['code'] for c in completed))
+    course_set = SemesterCourses(courses, checker)
+    return rank_plans(course_set, target_credits, preference, TOP_N)
+
+class IndexLockedError(RuntimeError):
+    """Raised when another process is already building the plan index"""
+
+def index_locked(index_path=INDEX_PATH):
+    """True while a live build holds index_path's lock"""
+    try:
+        return time.time() - os.stat(index_path + ".lock").st_mtime < LOCK_STALE
+    except OSError:
+        return False
+
+def _acquire_lock(lock_path):
+    for _ in range(2):
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                age = time.time() - os.stat(lock_path).st_mtime
+            except OSError:
+                continue  # released meanwhile
+            if age < LOCK_STALE:
+                raise IndexLockedError(f"{lock_path} is held by another build")
+            log.warning("Taking over plan index lock %s, untouched for %.0fs", lock_path, age)
+            try:
+                os.remove(lock_path)
+            except OSError:
+                pass
+            continue
+        with os.fdopen(fd, 'w') as f:
+            f.write(str(os.getpid()))
+        return
+    raise IndexLockedError(f"Could not take {lock_path}")
+
+def build_index(db_path=DB_PATH, index_path=INDEX_PATH):
+    """
+    Run the CSP + GA ranking for every (program, semester, credits,
+    preference) key and store the top plans in index_path
+    
+    Plans are stored as bitmasks over the semester's courses in catalog order
+    (by code), together with a fingerprint of the catalog they came from.
+    Raises IndexLockedError when another build holds the lock.
+    Returns the number of keys written.
+    """
+    lock_path = index_path + ".lock"
+    _acquire_lock(lock_path)
+    try:
+        return _build_index(db_path, index_path, lock_path)
+    finally:
+        try:
+            os.remove(lock_path)
+        except OSError:
+            pass
+
+def _build_index(db_path, index_path, lock_path):
+    fingerprint = catalog_fingerprint(db_path)
+    catalog = Catalog(db_path, check_mtime=False)
+    program_ids = sorted(p['id'] for d in catalog.departments() for p in catalog.programs(d['id']))
+
+    rows = []
+    for program_id in program_ids:
+        try:
+            catalog.prerequisite_graph(program_id)
+        except PrerequisiteGraphError:
+            continue  # not indexed: its requests get the same error from the live path
+        os.utime(lock_path)  # still alive
+        for semester in SEMESTERS:
+            if not catalog.courses_for_semester(program_id, semester):
+                continue
+            for target_credits in CREDIT_RANGE:
+                for preference in PREFERENCES:
+                    plans = rank_key(catalog, program_id, semester, target_credits, preference)
+                    rows.append((program_id, semester, target_credits, preference, json.dumps(plans)))
+
+    # Write to a temp file and swap it in, so readers never see a partial index
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute("""
+            CREATE TABLE plan_index (
+                program_id INTEGER NOT NULL,
+                semester INTEGER NOT NULL,
+                target_credits INTEGER NOT NULL,
+                preference TEXT NOT NULL,
+                plans TEXT NOT NULL,
+                PRIMARY KEY (program_id, semester, target_credits, preference)
+            ) WITHOUT ROWID
+        """)
+        conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        with conn:
+            conn.executemany("INSERT INTO plan_index VALUES (?, ?, ?, ?, ?)", rows)
+            conn.execute("INSERT INTO meta VALUES ('fingerprint', ?)", (fingerprint,))
+    finally:
+        conn.close()
+    os.replace(tmp_path, index_path)
+    return len(rows)
+
+class PlanIndex:
+    """
+    Read side of the plan index used by app.api_plan
+
+    lookup() returns the stored plan bitmasks, or None when the key is not
+    indexed or the index does not match the current catalog. A missing or
+    stale index is rebuilt in a background thread (auto_rebuild) while
+    requests fall back to the live search. Only the process that takes the
+    build lock rebuilds; the others re-validate once the new file appears
+    and only try the lock again when it goes stale.
+
+    A forked child (gunicorn --preload after app.warm_up()) drops the
+    connection and rebuild state it inherited and reopens the index itself
+    on first use; a rebuild the parent started keeps its lock.
+    """
+
+    def __init__(self, db_path=DB_PATH, index_path=INDEX_PATH, auto_rebuild=True):
+        self.db_path = db_path
+        self.index_path = index_path
+        self.auto_rebuild = auto_rebuild
+        self._lock = threading.Lock()
+        self._conn = None
+        self._index_mtime = None
+        self._catalog_mtime = None
+        self._valid = False
+        self._rebuilding = False
+        self._next_rebuild = 0.0
+        self.hits = 0
+        self.misses = 0
+        ref = weakref.ref(self)
+        os.register_at_fork(after_in_child=lambda: ref() is not None and ref()._after_fork())
+
+    def _after_fork(self):
+        # The lock may have been held by a thread that does not exist here, the
+        # rebuild thread was not copied, and the parent's SQLite connection
+        # must not be used across fork()
+        self._lock = threading.Lock()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        self._index_mtime = self._catalog_mtime = None
+        self._valid = False
+        self._rebuilding = False
+
+    def _mtime(self, path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _refresh(self):
+        """Reopen/revalidate when either file changed; called with the lock held"""
+        catalog_mtime = db_version(self.db_path)
+        index_mtime = self._mtime(self.index_path)
+        if catalog_mtime != self._catalog_mtime or index_mtime != self._index_mtime:
+            self._catalog_mtime, self._index_mtime = catalog_mtime, index_mtime
+            self._reopen(index_mtime)
+
+        if (not self._valid and self.auto_rebuild and not self._rebuilding
+                and time.monotonic() >= self._next_rebuild):
+            self._next_rebuild = time.monotonic() + REBUILD_RETRY
+            if not index_locked(self.index_path):
+                self._rebuilding = True
+                threading.Thread(target=self._rebuild, daemon=True).start()
+
+    def _reopen(self, index_mtime):
+        """Reconnect to the index file and check its catalog fingerprint"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        self._valid = False
+
+        if index_mtime is not None:
+            try:
+                self._conn = sqlite3.connect(f"file:{self.index_path}?mode=ro", uri=True,
+                                             check_same_thread=False)
+                row = self._conn.execute("SELECT value FROM meta WHERE key = 'fingerprint'").fetchone()
+                self._valid = row is not None and row[0] == catalog_fingerprint(self.db_path)
+            except sqlite3.Error as e:
+                log.warning("Ignoring unreadable plan index %s: %s", self.index_path, e)
+
+    def _rebuild(self):
+        try:
+            build_index(self.db_path, self.index_path)
+        except Exception as e:
+            if isinstance(e, IndexLockedError):
+                log.info("Plan index not rebuilt here: %s", e)
+            else:
+                log.error("Plan index rebuild failed: %s", e)
+            with self._lock:
+                self._rebuilding = False
+            return
+        with self._lock:
+            self._rebuilding = False
+            # Force revalidation against the new file
+            self._index_mtime = None
+
+    def warm_up(self):
+        """Open and validate the index now (starting a rebuild if it is stale)"""
+        with self._lock:
+            self._refresh()
+            return self._valid
+
+    def lookup(self, program_id, semester, target_credits, preference):
+        with self._lock:
+            self._refresh()
+            row = None
+            if self._valid:
+                row = self._conn.execute(LOOKUP_SQL, (program_id, semester, target_credits,
+                                                      preference)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[0])
+
+    def stats(self):
+        with self._lock:
+            return {'valid': self._valid, 'rebuilding': self._rebuilding,
+                    'hits': self.hits, 'misses': self.misses}
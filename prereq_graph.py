@@ -0,0 +1,333 @@
+import hashlib
+
+from csp import PrerequisiteChecker, parse_prerequisites
+from metrics import log
+
+# Normalized form of program_courses.prerequisites, written by migrate():
+# one edge per (offering, required course), plus each program's topological
+# order and transitive closure over courses, and a digest of the text each
+# program's tables were built from (see source_digest)
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS prerequisite_edges (
+        program_id INTEGER NOT NULL,
+        semester INTEGER NOT NULL,
+        course_id INTEGER NOT NULL,
+        prerequisite_id INTEGER NOT NULL,
+        PRIMARY KEY (program_id, semester, course_id, prerequisite_id),
+        FOREIGN KEY (course_id) REFERENCES courses(id),
+        FOREIGN KEY (prerequisite_id) REFERENCES courses(id)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS prerequisite_order (
+        program_id INTEGER NOT NULL,
+        course_id INTEGER NOT NULL,
+        position INTEGER NOT NULL,
+        PRIMARY KEY (program_id, course_id),
+        FOREIGN KEY (course_id) REFERENCES courses(id)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS prerequisite_closure (
+        program_id INTEGER NOT NULL,
+        course_id INTEGER NOT NULL,
+        ancestor_id INTEGER NOT NULL,
+        PRIMARY KEY (program_id, course_id, ancestor_id),
+        FOREIGN KEY (course_id) REFERENCES courses(id),
+        FOREIGN KEY (ancestor_id) REFERENCES courses(id)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS prerequisite_source (
+        program_id INTEGER PRIMARY KEY,
+        digest TEXT NOT NULL
+    )
+    """,
+]
+
+class PrerequisiteGraphError(ValueError):
+    """Raised when prerequisites name unknown courses or form a cycle"""
+
+class ProgramGraph:
+    """
+    In-memory prerequisite DAG of one program
+
+    Every course the program offers or requires gets one bit, assigned in
+    topological order (prerequisites first). requires[(semester, code)] is
+    the bitmask of an offering's direct prerequisites and closure[code] the
+    bitmask of everything the course needs transitively, so checking a
+    completed set is a single AND. A course listing itself (a retake of an
+    earlier offering) is a normal edge for requires but ignored by the order
+    and the closure.
+    """
+
+    def __init__(self, program_id, order=(), requires=None, closure=None):
+        self.program_id = program_id
+        self.order = list(order)
+        self.bits = {code: 1 << i for i, code in enumerate(self.order)}
+        self.requires = requires or {}
+        self.closure = closure or {}
+
+    def mask(self, codes):
+        """Bitmask of the given codes (codes outside the program are ignored)"""
+        bits = self.bits
+        mask = 0
+        for code in codes:
+            mask |= bits.get(code, 0)
+        return mask
+
+    def codes(self, mask):
+        """Codes in a bitmask, in topological order"""
+        return [code for i, code in enumerate(self.order) if (mask >> i) & 1]
+
+    def ancestors(self, code):
+        """Every course `code` needs, directly or not, in topological order"""
+        return self.codes(self.closure.get(code, 0))
+
+    def checker(self, semester, completed_codes):
+        """PrerequisiteChecker for one semester of this program"""
+        return GraphChecker(self, semester, completed_codes)
+
+class GraphChecker(PrerequisiteChecker):
+    """
+    PrerequisiteChecker backed by a ProgramGraph: the completed set becomes
+    one bitmask and each course is checked with requires & ~completed.
+    Courses the graph does not know fall back to parsing their prerequisites.
+    """
+
+    def __init__(self, graph, semester, completed_codes):
+        super().__init__()
+        self.completed_codes = frozenset(completed_codes)
+        self.graph = graph
+        self.semester = semester
+        self.completed_mask = graph.mask(self.completed_codes)
+
+    def is_satisfied(self, course):
+        required = self.graph.requires.get((self.semester, course['code']))
+        if required is None:
+            return super().is_satisfied(course)
+        return not required & ~self.completed_mask
+
+def build_graph(program_id, offerings, known_codes):
+    """
+    ProgramGraph from (semester, code, prerequisite codes) offerings
+
+    Raises PrerequisiteGraphError for prerequisite codes that are not in
+    known_codes (dangling) and for cycles between different courses.
+    """
+    dangling = sorted({(code, p) for _, code, prereqs in offerings for p in prereqs
+                       if p not in known_codes})
+    if dangling:
+        listed = ", ".join(f"{code} -> {p}" for code, p in dangling[:10])
+        raise PrerequisiteGraphError(f"Program {program_id}: unknown prerequisite codes: {listed}")
+
+    needs = {}
+    for _, code, prereqs in offerings:
+        needs.setdefault(code, set()).update(p for p in prereqs if p != code)
+        for p in prereqs:
+            needs.setdefault(p, set())
+
+    # Kahn's algorithm; the smallest ready code goes first so the order is stable
+    dependents = {code: [] for code in needs}
+    waiting = {}
+    for code, prereqs in needs.items():
+        waiting[code] = len(prereqs)
+        for p in prereqs:
+            dependents[p].append(code)
+    ready = sorted(code for code, count in waiting.items() if count == 0)
+    order = []
+    while ready:
+        code = ready.pop(0)
+        order.append(code)
+        for d in dependents[code]:
+            waiting[d] -= 1
+            if waiting[d] == 0:
+                ready.append(d)
+        ready.sort()
+    if len(order) < len(needs):
+        cyclic = sorted(code for code, count in waiting.items() if count > 0)
+        raise PrerequisiteGraphError(f"Program {program_id}: prerequisite cycle among {', '.join(cyclic[:10])}")
+
+    graph = ProgramGraph(program_id, order)
+    for code in order:
+        mask = 0
+        for p in needs[code]:
+            mask |= graph.bits[p] | graph.closure[p]
+        graph.closure[code] = mask
+    for semester, code, prereqs in offerings:
+        graph.requires[(semester, code)] = graph.mask(prereqs)
+    return graph
+
+def _record(errors, program_id, error):
+    """Store a program's PrerequisiteGraphError in errors, or raise it without an errors dict"""
+    if errors is None:
+        raise error
+    errors[program_id] = error
+
+def build_graphs(rows, known_codes, errors=None):
+    """
+    {program_id: ProgramGraph} from (program_id, semester, code, prerequisites text) rows
+    With an `errors` dict, invalid programs are left out and their errors stored there
+    """
+    offerings = {}
+    for program_id, semester, code, prerequisites in rows:
+        offerings.setdefault(program_id, []).append((semester, code, parse_prerequisites(prerequisites)))
+    graphs = {}
+    for program_id, items in offerings.items():
+        try:
+            graphs[program_id] = build_graph(program_id, items, known_codes)
+        except PrerequisiteGraphError as e:
+            _record(errors, program_id, e)
+    return graphs
+
+# Queries load_graphs() runs; {where} is empty or limits them to one program
+GRAPH_SQL = {
+    'text': """
+        SELECT x.program_id, x.semester, c.code, x.prerequisites
+        FROM program_courses x JOIN courses c ON c.id = x.course_id
+        {where}
+    """,
+    'order': """
+        SELECT x.program_id, c.code
+        FROM prerequisite_order x JOIN courses c ON c.id = x.course_id
+        {where} ORDER BY x.program_id, x.position
+    """,
+    'offerings': """
+        SELECT x.program_id, x.semester, c.code
+        FROM program_courses x JOIN courses c ON c.id = x.course_id
+        {where}
+    """,
+    'edges': """
+        SELECT x.program_id, x.semester, c.code, p.code
+        FROM prerequisite_edges x
+        JOIN courses c ON c.id = x.course_id JOIN courses p ON p.id = x.prerequisite_id
+        {where}
+    """,
+    'closure': """
+        SELECT x.program_id, c.code, a.code
+        FROM prerequisite_closure x
+        JOIN courses c ON c.id = x.course_id JOIN courses a ON a.id = x.ancestor_id
+        {where}
+    """,
+    'source': """
+        SELECT x.program_id, x.digest FROM prerequisite_source x {where}
+    """,
+}
+
+def graph_sql(name, program_id=None):
+    """(sql, params) of one GRAPH_SQL query, for every program or just program_id"""
+    if program_id is None:
+        return GRAPH_SQL[name].format(where=""), ()
+    return GRAPH_SQL[name].format(where="WHERE x.program_id = ?"), (program_id,)
+
+def _has_table(conn, name):
+    row = conn.execute("""
+        SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?
+    """, (name,)).fetchone()
+    return row is not None
+
+def _offerings_text(rows):
+    """{program_id: [(semester, code, prerequisites text)]} from GRAPH_SQL['text'] rows"""
+    offerings = {}
+    for program_id, semester, code, prerequisites in rows:
+        offerings.setdefault(program_id, []).append((semester, code, prerequisites))
+    return offerings
+
+def source_digest(offerings):
+    """Digest of one program's (semester, code, prerequisites text) rows, in any order"""
+    return hashlib.sha256(repr(sorted(offerings, key=repr)).encode()).hexdigest()
+
+def migrate(conn):
+    """
+    Fill the prerequisite tables from program_courses.prerequisites
+
+    Validates every program first (PrerequisiteGraphError leaves the
+    database untouched) and replaces the previous tables in one transaction.
+    Returns the number of edges written.
+    """
+    ids = {code: course_id for course_id, code in conn.execute("SELECT id, code FROM courses")}
+    text_rows = conn.execute(*graph_sql('text')).fetchall()
+    graphs = build_graphs(text_rows, set(ids))
+    sources = [(program_id, source_digest(offerings))
+               for program_id, offerings in _offerings_text(text_rows).items()]
+
+    edges, order, closure = [], [], []
+    for program_id, graph in graphs.items():
+        for (semester, code), mask in graph.requires.items():
+            edges.extend((program_id, semester, ids[code], ids[p]) for p in graph.codes(mask))
+        for position, code in enumerate(graph.order):
+            order.append((program_id, ids[code], position))
+            closure.extend((program_id, ids[code], ids[a]) for a in graph.ancestors(code))
+
+    with conn:
+        for statement in SCHEMA:
+            conn.execute(statement)
+        for table in ("prerequisite_edges", "prerequisite_order", "prerequisite_closure",
+                      "prerequisite_source"):
+            conn.execute(f"DELETE FROM {table}")
+        conn.executemany("INSERT INTO prerequisite_edges VALUES (?, ?, ?, ?)", edges)
+        conn.executemany("INSERT INTO prerequisite_order VALUES (?, ?, ?)", order)
+        conn.executemany("INSERT INTO prerequisite_closure VALUES (?, ?, ?)", closure)
+        conn.executemany("INSERT INTO prerequisite_source VALUES (?, ?)", sources)
+    return len(edges)
+
+def load_graphs(conn, program_id=None, errors=None):
+    """
+    {program_id: ProgramGraph} for every program (or just program_id)
+
+    Reads the tables migrate() wrote. program_courses.prerequisites stays
+    the source of truth: a program whose text no longer matches the digest
+    migrate() stored (edited without re-running it), and every program of a
+    database that was never migrated, is parsed and validated from the text
+    column instead.
+
+    A program with invalid prerequisites raises PrerequisiteGraphError, or,
+    given an `errors` dict, is left out with its error stored in
+    errors[program_id] so the other programs still load.
+    """
+    text_rows = conn.execute(*graph_sql('text', program_id)).fetchall()
+    offerings = _offerings_text(text_rows)
+    stored = {}
+    if _has_table(conn, 'prerequisite_source'):
+        stored = dict(conn.execute(*graph_sql('source', program_id)))
+    stale = {pid for pid, items in offerings.items() if stored.get(pid) != source_digest(items)}
+    text_graphs = {}
+    if stale:
+        if _has_table(conn, 'prerequisite_edges'):
+            log.warning("Prerequisites of program(s) %s changed since the last migration; "
+                        "using program_courses.prerequisites (re-run migrate_prerequisites.py)",
+                        ", ".join(map(str, sorted(stale))))
+        known = {code for (code,) in conn.execute("SELECT code FROM courses")}
+        text_graphs = build_graphs([row for row in text_rows if row[0] in stale], known, errors)
+        if stale == set(offerings):
+            return text_graphs
+
+    graphs = {}
+    for pid, code in conn.execute(*graph_sql('order', program_id)):
+        if pid not in stale:
+            graphs.setdefault(pid, []).append(code)
+    graphs = {pid: ProgramGraph(pid, order) for pid, order in graphs.items()}
+
+    # Offerings without prerequisites still get an (empty) requires entry
+    failed = set()
+    for pid, semester, code in conn.execute(*graph_sql('offerings', program_id)):
+        if pid in stale:
+            continue
+        if pid not in graphs:
+            if pid not in failed:
+                failed.add(pid)
+                _record(errors, pid, PrerequisiteGraphError(
+                    f"Program {pid} has no prerequisite order; re-run migrate_prerequisites.py"))
+            continue
+        graphs[pid].requires[(semester, code)] = 0
+    for pid, semester, code, prereq in conn.execute(*graph_sql('edges', program_id)):
+        graph = graphs.get(pid)
+        if graph is not None:
+            graph.requires[(semester, code)] |= graph.bits[prereq]
+    for pid, code, ancestor in conn.execute(*graph_sql('closure', program_id)):
+        graph = graphs.get(pid)
+        if graph is not None:
+            graph.closure[code] = graph.closure.get(code, 0) | graph.bits[ancestor]
+    graphs.update(text_graphs)
+    return graphs
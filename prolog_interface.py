@@ -1,60 +1,196 @@
-from pyswip import Prolog
+import os
+import threading
 
-prolog = Prolog()
-prolog.consult("advisor.pl")
+from cache import LRUCache
+
+ADVISOR_PATH = "advisor.pl"
+
+# "compiled" evaluates advisor.pl in Python, "prolog" queries SWI-Prolog via
+# pyswip and "crosscheck" runs both and fails loudly if they disagree
+ADVICE_BACKEND = os.environ.get("PLANNER_ADVICE_BACKEND", "compiled")
+
+# With PLANNER_PROLOG_WORKERS > 0, Prolog queries run in that many worker
+# processes (prolog_pool.py); otherwise in this process, one thread at a time
+PROLOG_WORKERS = int(os.environ.get("PLANNER_PROLOG_WORKERS", "0"))
+PROLOG_TIMEOUT = float(os.environ.get("PLANNER_PROLOG_TIMEOUT", "5.0"))
+
+# Every advisor.pl rule get_advice asks about, with its arguments
+ADVICE_QUERIES = [
+    ("warn", ("cgpa", "credits")),
+    ("warn_moderate", ("cgpa", "credits")),
+    ("warn_difficulty", ("cgpa", "hard_count")),
+    ("recommend_reduce", ("cgpa", "credits")),
+    ("recommend_limit_hard", ("cgpa", "hard_count")),
+    ("recommend_increase", ("cgpa", "credits")),
+]
+
+# Fired rules only depend on the CGPA band (see cgpa_band), credits and the
+# Challenging count, so they are cached on exactly that key; the advice
+# text (which echoes the exact CGPA) is rebuilt from them on every call.
+# PLANNER_ADVICE_CACHE_SIZE=0 disables it.
+advice_cache = LRUCache(int(os.environ.get("PLANNER_ADVICE_CACHE_SIZE", "4096")))
+
+# Nothing is parsed, consulted or started at import time: importing this
+# module (and app.py) stays cheap for routes and tools that never need advice
+_rules = None
+_cgpa_thresholds = None
+_rules_lock = threading.Lock()
+_prolog = None
+_prolog_lock = threading.Lock()
+_pool = None
+
+def get_rules():
+    """advisor.pl compiled into a RuleSet, parsed on first use"""
+    global _rules
+    if _rules is None:
+        with _rules_lock:
+            if _rules is None:
+                from advisor_rules import RuleSet
+                _rules = RuleSet.from_file(ADVISOR_PATH)
+    return _rules
+
+def get_prolog():
+    """SWI-Prolog engine with advisor.pl consulted, created on first use"""
+    global _prolog
+    if _prolog is None:
+        from pyswip import Prolog
+        _prolog = Prolog()
+        _prolog.consult(ADVISOR_PATH)
+    return _prolog
+
+def get_prolog_pool():
+    """Worker-process pool for Prolog queries, created on first use"""
+    global _pool
+    with _prolog_lock:
+        if _pool is None:
+            from prolog_pool import PrologPool
+            _pool = PrologPool(PROLOG_WORKERS, timeout=PROLOG_TIMEOUT)
+        return _pool
+
+def warm_up(prolog=True):
+    """
+    Load the advice backend now rather than on the first request: parse
+    advisor.pl and, for the prolog/crosscheck backends (and prolog=True),
+    start the SWI-Prolog engine or worker pool
+    """
+    get_rules()
+    if prolog and ADVICE_BACKEND != "compiled":
+        if PROLOG_WORKERS > 0:
+            get_prolog_pool().warm_up()
+        else:
+            with _prolog_lock:
+                get_prolog()
+
+def evaluate_rules_local(values):
+    """Query every advice rule in this process's Prolog engine"""
+    result = {}
+    # The engine is not thread-safe, so only one thread queries it at a time
+    with _prolog_lock:
+        prolog = get_prolog()
+        for name, args in ADVICE_QUERIES:
+            q = list(prolog.query(f"{name}({','.join(str(values[a]) for a in args)})"))
+            result[name] = bool(q)
+    return result
+
+def evaluate_rules_prolog(values):
+    """Same result as get_rules().evaluate(ADVICE_QUERIES, values), via pyswip"""
+    if PROLOG_WORKERS > 0:
+        return get_prolog_pool().evaluate(values)
+    return evaluate_rules_local(values)
+
+def evaluate_rules(cgpa, credits, hard_count, backend=None):
+    """Evaluate every advice rule for one (cgpa, credits, hard_count) tuple"""
+    backend = backend or ADVICE_BACKEND
+    values = {'cgpa': cgpa, 'credits': credits, 'hard_count': hard_count}
+    if backend == "prolog":
+        return evaluate_rules_prolog(values)
+
+    result = get_rules().evaluate(ADVICE_QUERIES, values)
+    if backend == "crosscheck":
+        expected = evaluate_rules_prolog(values)
+        if result != expected:
+            raise AssertionError(f"Compiled rules disagree with Prolog for {values}: {result} != {expected}")
+    return result
+
+def cgpa_thresholds():
+    """Every number advisor.pl compares the CGPA with in an ADVICE_QUERIES rule"""
+    global _cgpa_thresholds
+    if _cgpa_thresholds is None:
+        rules = get_rules()
+        found = set()
+        for name, args in ADVICE_QUERIES:
+            for position, arg in enumerate(args):
+                if arg == "cgpa":
+                    found |= rules.constants(name, len(args), position)
+        _cgpa_thresholds = tuple(sorted(found))
+    return _cgpa_thresholds
+
+def cgpa_band(cgpa):
+    """
+    How cgpa compares (-1, 0, 1) with each of cgpa_thresholds(): CGPAs in
+    the same band fire the same advice rules
+    """
+    return tuple((cgpa > t) - (cgpa < t) for t in cgpa_thresholds())
 
 def get_advice(cgpa, courses):
     """
     Get comprehensive academic advice based on CGPA and course plan
     """
     credits = sum([c['credits'] for c in courses])
-    
+
     # Count difficulty levels
     hard_count = len([c for c in courses if c['difficulty'] == 'Challenging'])
     easy_count = len([c for c in courses if c['difficulty'] == 'Easy'])
     balanced_count = len([c for c in courses if c['difficulty'] == 'Balanced'])
-    
+
+    key = (cgpa_band(cgpa), credits, hard_count)
+    fired = advice_cache.get(key)
+    if fired is None:
+        fired = evaluate_rules(cgpa, credits, hard_count)
+        advice_cache.put(key, fired)
+
+    return build_advice(cgpa, credits, easy_count, balanced_count, hard_count, fired)
+
+def build_advice(cgpa, credits, easy_count, balanced_count, hard_count, fired=None):
+    """Advice for a plan summary; `fired` is evaluate_rules() for it, if known"""
     advice = []
     warnings = []
-    
+
+    if fired is None:
+        fired = evaluate_rules(cgpa, credits, hard_count)
+
     # Check critical warnings
-    q = list(prolog.query(f"warn({cgpa},{credits})"))
-    if q:
+    if fired['warn']:
         warnings.append("⚠️ HIGH RISK: Low CGPA + Heavy credit load")
         advice.append("Consider reducing to 12-15 credits")
-    
+
     # Check moderate warnings
-    q = list(prolog.query(f"warn_moderate({cgpa},{credits})"))
-    if q:
+    if fired['warn_moderate']:
         warnings.append("⚠️ MODERATE RISK: CGPA below 3.0 with heavy load")
         advice.append("Monitor workload carefully")
-    
+
     # Check difficulty warnings
-    q = list(prolog.query(f"warn_difficulty({cgpa},{hard_count})"))
-    if q:
+    if fired['warn_difficulty']:
         warnings.append("⚠️ TOO MANY CHALLENGING COURSES")
         advice.append(f"Limit challenging courses to 3-4 (currently {hard_count})")
-    
+
     # Recommendations
-    q = list(prolog.query(f"recommend_reduce({cgpa},{credits})"))
-    if q and not warnings:
+    if fired['recommend_reduce'] and not warnings:
         advice.append(f"💡 Recommend reducing to 12-15 credits given CGPA {cgpa}")
-    
-    q = list(prolog.query(f"recommend_limit_hard({cgpa},{hard_count})"))
-    if q and not warnings:
+
+    if fired['recommend_limit_hard'] and not warnings:
         advice.append(f"💡 Consider limiting challenging courses (currently {hard_count})")
-    
-    q = list(prolog.query(f"recommend_increase({cgpa},{credits})"))
-    if q:
+
+    if fired['recommend_increase']:
         advice.append(f"✅ Good CGPA! You can handle more credits if desired")
-    
+
     # General status
     if not warnings:
         if cgpa >= 3.0:
             warnings.append("✅ SAFE: Academic plan is appropriate")
         elif cgpa >= 2.5:
             warnings.append("✓ ACCEPTABLE: Plan is manageable")
-    
+
     return {
         'warnings': warnings,
         'advice': advice,
@@ -0,0 +1,86 @@
+import threading
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from serving import WorkerProcesses
+
+class PoolBusyError(RuntimeError):
+    """Raised when too many Prolog requests are already queued"""
+
+class PoolTimeoutError(TimeoutError):
+    """Raised when a Prolog worker does not answer in time"""
+
+def _init_worker():
+    # Each worker process owns one SWI-Prolog engine with advisor.pl consulted
+    import prolog_interface
+    prolog_interface.get_prolog()
+
+def _evaluate_in_worker(values):
+    import prolog_interface
+    return prolog_interface.evaluate_rules_local(values)
+
+class PrologPool:
+    """
+    Pool of worker processes, each with its own consulted advisor.pl
+
+    SWI-Prolog engines must not be shared between request threads, so the
+    queries run in separate processes. At most `max_pending` requests can be
+    queued or running; beyond that submit() waits up to `timeout` seconds for
+    a slot and then raises PoolBusyError (backpressure). A request that takes
+    longer than `timeout` raises PoolTimeoutError.
+    """
+
+    def __init__(self, workers=2, timeout=5.0, max_pending=None):
+        self.workers = workers
+        self.timeout = timeout
+        self.max_pending = max_pending or workers * 8
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._processes = WorkerProcesses(workers, initializer=_init_worker)
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.timeouts = 0
+
+    def submit(self, fn, *args):
+        """Run fn(*args) in a worker process and return its result"""
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self.rejected += 1
+            raise PoolBusyError(f"More than {self.max_pending} Prolog requests pending")
+        try:
+            future = self._processes.get().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda f: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            future.cancel()
+            with self._lock:
+                self.timeouts += 1
+            raise PoolTimeoutError(f"Prolog worker did not answer within {self.timeout}s")
+        except BrokenProcessPool:
+            # A worker died (e.g. crashed engine): start fresh ones next time
+            self._processes.discard()
+            raise
+
+    def evaluate(self, values):
+        """Evaluate the advice rules in a worker's Prolog engine"""
+        return self.submit(_evaluate_in_worker, values)
+
+    def warm_up(self):
+        """Start every worker (and consult advisor.pl) ahead of the first request"""
+        executor = self._processes.get()
+        for future in [executor.submit(_init_worker) for _ in range(self.workers)]:
+            future.result()
+
+    def shutdown(self):
+        self._processes.shutdown()
+
+    def stats(self):
+        return {
+            'workers': self.workers,
+            'max_pending': self.max_pending,
+            'rejected': self.rejected,
+            'timeouts': self.timeouts,
+        }
@@ -0,0 +1,119 @@
+"""
+EXPLAIN QUERY PLAN audit of every SQL query the planner issues
+
+    python query_audit.py [db_path] [--index-path plan_index.db] [--create-indexes]
+
+A query fails the audit when its plan scans a table (or a whole index)
+instead of searching it, unless it is one of the deliberate whole-table
+reads (Catalog._load, the plan index fingerprint, migrations), or when it
+cannot be planned at all (e.g. a table that was never migrated). Exits with
+status 1 on failures; --create-indexes first adds any missing catalog
+indexes (generate_catalog.SCHEMA) to an existing database.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+
+import catalog
+import db
+import plan_index
+import prereq_graph
+from generate_catalog import create_schema
+
+def catalog_queries():
+    """(name, sql, params, scan allowed) for every query against the catalog database"""
+    queries = [
+        ('db.departments', db.DEPARTMENTS_SQL, (), True),
+        ('db.programs', db.PROGRAMS_SQL, (1,), False),
+        ('db.courses_for_semester', db.SEMESTER_COURSES_SQL, (1, 3), False),
+        ('db.completed_courses', db.COMPLETED_COURSES_SQL, (1, 3), False),
+        ('catalog.load_departments', catalog.LOAD_DEPARTMENTS_SQL, (), True),
+        ('catalog.load_programs', catalog.LOAD_PROGRAMS_SQL, (), True),
+        ('catalog.load_courses', catalog.LOAD_COURSES_SQL, (), True),
+        ('plan_index.fingerprint', plan_index.FINGERPRINT_SQL, (), True),
+        ('plan_index.prerequisite_fingerprint', plan_index.PREREQUISITE_FINGERPRINT_SQL, (), True),
+    ]
+    for name in prereq_graph.GRAPH_SQL:
+        sql, params = prereq_graph.graph_sql(name)
+        queries.append((f"prereq_graph.{name}", sql, params, True))
+        sql, params = prereq_graph.graph_sql(name, 1)
+        queries.append((f"prereq_graph.{name}(program)", sql, params, False))
+    return queries
+
+def index_queries():
+    """Same, for the plan index database"""
+    return [('plan_index.lookup', plan_index.LOOKUP_SQL, (1, 3, 18, 'balanced'), False)]
+
+def scans(conn, sql, params):
+    """The EXPLAIN QUERY PLAN steps of a query that scan rather than search"""
+    plan = conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    return [row[3] for row in plan if row[3].startswith("SCAN ")]
+
+def audit(conn, queries):
+    """
+    Audit queries on one connection; returns (report, failures) where the
+    report maps each query name to its scan steps
+    """
+    report, failures = {}, []
+    for name, sql, params, scan_allowed in queries:
+        try:
+            steps = scans(conn, sql, params)
+        except sqlite3.OperationalError as e:
+            # e.g. a table that was never migrated: the query is unchecked
+            report[name] = {'error': str(e)}
+            failures.append(f"{name}: {e}")
+            continue
+        report[name] = {'scans': steps, 'scan_allowed': scan_allowed}
+        if steps and not scan_allowed:
+            failures.append(f"{name}: {'; '.join(steps)}")
+    return report, failures
+
+def audit_database(db_path=catalog.DB_PATH, index_path=plan_index.INDEX_PATH):
+    """audit() of the catalog (and plan index, if present); returns (report, failures)"""
+    conn = sqlite3.connect(db_path)
+    try:
+        report, failures = audit(conn, catalog_queries())
+    finally:
+        conn.close()
+    if index_path and os.path.exists(index_path):
+        conn = sqlite3.connect(index_path)
+        try:
+            index_report, index_failures = audit(conn, index_queries())
+        finally:
+            conn.close()
+        report.update(index_report)
+        failures.extend(index_failures)
+    return report, failures
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN QUERY PLAN audit")
+    parser.add_argument('db_path', nargs='?', default=catalog.DB_PATH)
+    parser.add_argument('--index-path', default=plan_index.INDEX_PATH)
+    parser.add_argument('--create-indexes', action='store_true',
+                        help="add missing catalog indexes before auditing")
+    args = parser.parse_args()
+
+    if args.create_indexes:
+        conn = sqlite3.connect(args.db_path)
+        with conn:
+            create_schema(conn)
+        conn.close()
+
+    report, failures = audit_database(args.db_path, args.index_path)
+    for name, result in report.items():
+        if 'error' in result:
+            continue
+        if result['scans'] and result['scan_allowed']:
+            print(f"   ✓ {name}: whole-table read")
+        elif not result['scans']:
+            print(f"   ✓ {name}: indexed")
+    if failures:
+        print(f"❌ {len(failures)} quer{'y' if len(failures) == 1 else 'ies'} failed the audit:")
+        for line in failures:
+            print(f"   {line}")
+        sys.exit(1)
+    print(f"✅ No unexpected table scans in {args.db_path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+import time
+from itertools import islice
+
+from course_set import SemesterCourses
+from csp import iter_plans
+from ga import fitness_mask
+from pipeline import advice_stage, rank_plans
+
+LAST_SEMESTER = 8
+
+class RoadmapError(ValueError):
+    """Raised when some semester of the roadmap has no feasible plan"""
+
+class RoadmapPlanner:
+    """
+    Plans every semester from `start_semester` through LAST_SEMESTER at once
+
+    Dynamic program over (semester, completed-set) states: the best roadmap
+    from a state is the best of the `branching` top plans for that semester,
+    each followed by the best roadmap from the resulting state. Courses taken
+    earlier in the roadmap are not offered again, and they count as completed
+    for later prerequisite checks. States are keyed only on the completed
+    codes that later semesters can still see (their course codes and
+    prerequisites), so equivalent subproblems are solved once.
+
+    A semester's candidates are its top `candidates` plans by fitness; they
+    are tried in order until `branching` of them lead to a complete roadmap,
+    so a dead end (later semesters can no longer hit their targets) falls
+    through to the next candidate. The ranking of each semester stops at the
+    `budget` deadline. After it, states already on the stack keep the best
+    branch they have (or make one more attempt if they have none) and new
+    states take the first feasible plan without ranking or backtracking, so
+    the roadmap finishes within about budget plus a few CSP lookups.
+    """
+
+    def __init__(self, catalog, program_id, start_semester, credit_targets, preference,
+                 branching=3, budget=2.0, candidates=50):
+        self.catalog = catalog
+        self.program_id = program_id
+        self.start_semester = start_semester
+        self.credit_targets = credit_targets  # {semester: credits}
+        self.preference = preference
+        self.branching = branching
+        self.budget = budget
+        self.candidates = candidates
+
+        self.semester_courses = {s: catalog.courses_for_semester(program_id, s)
+                                 for s in range(start_semester, LAST_SEMESTER + 1)}
+        self.graph = catalog.prerequisite_graph(program_id)
+        self.initial_codes = frozenset(c['code'] for c in catalog.completed_courses(program_id, start_semester))
+
+        # Codes semester s (and later) can still observe
+        self.relevant = {LAST_SEMESTER + 1: frozenset()}
+        for s in range(LAST_SEMESTER, start_semester - 1, -1):
+            codes = set(self.relevant[s + 1])
+            for c in self.semester_courses[s]:
+                codes.add(c['code'])
+                codes.update(self.graph.codes(self.graph.requires.get((s, c['code']), 0)))
+            self.relevant[s] = frozenset(codes)
+
+        self._memo = {}
+        self.states = 0
+        self.memo_hits = 0
+        self.budget_exhausted = False
+        self._deadline = None
+
+    def _course_set(self, semester, completed, taken):
+        courses = [c for c in self.semester_courses[semester] if c['code'] not in taken]
+        return SemesterCourses(courses, self.graph.checker(semester, completed))
+
+    def _best(self, semester, completed, taken):
+        """(total fitness, [(semester, course_set, mask), ...]) from this state, or None"""
+        if semester > LAST_SEMESTER:
+            return 0.0, []
+
+        relevant = self.relevant[semester]
+        key = (semester, completed & relevant, taken & relevant)
+        if key in self._memo:
+            self.memo_hits += 1
+            return self._memo[key]
+        self.states += 1
+
+        target_credits = self.credit_targets[semester]
+        course_set = self._course_set(semester, completed, taken)
+        if self._out_of_time():
+            # Greedy: the first feasible plan, no ranking and no backtracking
+            candidates = islice(iter_plans(course_set, target_credits), 1)
+        else:
+            candidates = rank_plans(course_set, target_credits, self.preference, self.candidates,
+                                    deadline=self._deadline)
+        branching = 1 if self.budget_exhausted else self.branching
+
+        best = None
+        branches = 0
+        late_attempt = False
+        for mask in candidates:
+            if self._out_of_time():
+                # Keep what this state found; without anything, try one more candidate
+                if best is not None or late_attempt:
+                    break
+                late_attempt = True
+            codes = frozenset(course_set.courses[i]['code'] for i in course_set.indices(mask))
+            rest = self._best(semester + 1, completed | codes, taken | codes)
+            if rest is None:
+                continue
+            score = fitness_mask(course_set, mask, self.preference, target_credits, target_credits) + rest[0]
+            if best is None or score > best[0]:
+                best = (score, [(semester, course_set, mask)] + rest[1])
+            branches += 1
+            if branches >= branching:
+                break
+
+        self._memo[key] = best
+        return best
+
+    def _out_of_time(self):
+        if not self.budget_exhausted and time.monotonic() > self._deadline:
+            self.budget_exhausted = True
+        return self.budget_exhausted
+
+    def plan(self):
+        self._deadline = time.monotonic() + self.budget
+        best = self._best(self.start_semester, self.initial_codes, frozenset())
+        if best is None:
+            raise RoadmapError("No combination of semester plans meets every credit target "
+                                "without repeating a course")
+        return best
+
+def plan_roadmap(catalog, program_id, start_semester, credit_targets, preference, cgpa,
+                 branching=3, budget=2.0, candidates=50, deadline=None):
+    """
+    Roadmap response payload: one advised plan per semester plus search
+    counters. Raises RoadmapError when no roadmap exists. A time.monotonic()
+    `deadline` (from PlanExecutor) caps `budget`.
+    """
+    if deadline is not None:
+        budget = max(0.0, min(budget, deadline - time.monotonic()))
+    planner = RoadmapPlanner(catalog, program_id, start_semester, credit_targets, preference,
+                             branching, budget, candidates)
+    start = time.perf_counter()
+    total_fitness, steps = planner.plan()
+    elapsed = time.perf_counter() - start
+
+    semesters = []
+    for semester, course_set, mask in steps:
+        target_credits = credit_targets[semester]
+        plan = next(advice_stage(course_set, [mask], cgpa, target_credits, semester))
+        semesters.append({'semester': semester, 'target_credits': target_credits, 'plan': plan})
+
+    return {
+        'success': True,
+        'program_id': program_id,
+        'start_semester': start_semester,
+        'cgpa': cgpa,
+        'semesters': semesters,
+        'total_credits': sum(s['plan']['total_credits'] for s in semesters),
+        'total_fitness': total_fitness,
+        'search': {
+            'states': planner.states,
+            'memo_hits': planner.memo_hits,
+            'budget_exhausted': planner.budget_exhausted,
+            'elapsed_ms': round(elapsed * 1000, 1),
+        },
+        'method': 'Roadmap DP over CSP + GA + Prolog Expert System'
+    }
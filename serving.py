@@ -0,0 +1,130 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+# Plan searches running at once, and how many more may wait for a slot
+PLAN_WORKERS = int(os.environ.get("PLANNER_PLAN_WORKERS", "8"))
+PLAN_QUEUE = int(os.environ.get("PLANNER_PLAN_QUEUE", "32"))
+# Seconds one /api/plan request may spend planning (PLANNER_PLAN_BUDGET=0: no limit)
+PLAN_BUDGET = float(os.environ.get("PLANNER_PLAN_BUDGET", "10.0"))
+
+class ServerBusyError(RuntimeError):
+    """Raised when every worker is busy and the wait queue is full"""
+
+class DeadlineExceededError(TimeoutError):
+    """Raised when a planning task has not finished by its deadline"""
+
+class PlanExecutor:
+    """
+    Runs planning work off the request thread, with a concurrency limit and
+    per-request deadlines
+
+    At most `workers` tasks run at once and at most `queue` more wait for a
+    worker; any request beyond that is rejected with ServerBusyError right
+    away, so a burst turns into quick 503s instead of unbounded latency.
+
+    run(fn, ...) calls fn(..., deadline=d) where d is a time.monotonic()
+    value `budget` seconds from submission (queue time counts against it).
+    fn should stop by itself at d and return what it has (rank_plans does);
+    if it is still running `grace` seconds later the caller gets
+    DeadlineExceededError while the worker finishes in the background.
+    """
+
+    def __init__(self, workers=8, queue=32, budget=10.0, grace=1.0):
+        self.workers = workers
+        self.queue = queue
+        self.budget = budget
+        self.grace = grace
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="planner")
+        self._slots = threading.BoundedSemaphore(workers + queue)
+        self._lock = threading.Lock()
+        self.active = 0
+        self.completed = 0
+        self.rejected = 0
+        self.deadlines_exceeded = 0
+
+    def _call(self, fn, args, kwargs):
+        with self._lock:
+            self.active += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.completed += 1
+
+    def run(self, fn, *args, budget=None, **kwargs):
+        """fn(*args, deadline=..., **kwargs) in a worker thread; returns its result"""
+        budget = self.budget if budget is None else budget
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise ServerBusyError(f"All {self.workers} planners busy and {self.queue} requests queued")
+        deadline = time.monotonic() + budget if budget else None
+        try:
+            future = self._executor.submit(self._call, fn, args, dict(kwargs, deadline=deadline))
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda f: self._slots.release())
+        # wait() rather than result(timeout=...): a TimeoutError raised by fn
+        # itself (e.g. PoolTimeoutError) is the task's error, not our deadline
+        if not wait([future], timeout=budget + self.grace if budget else None).done:
+            future.cancel()
+            with self._lock:
+                self.deadlines_exceeded += 1
+            raise DeadlineExceededError(f"Planning did not finish within {budget}s")
+        return future.result()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'queue': self.queue,
+                'budget': self.budget,
+                'active': self.active,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'deadlines_exceeded': self.deadlines_exceeded,
+            }
+
+class WorkerProcesses:
+    """
+    ProcessPoolExecutor started on first use, for the CSP and Prolog pools
+
+    Workers are spawned, not forked: the parent has Flask threads running.
+    After a BrokenProcessPool (a worker died) call discard(), and the next
+    get() starts fresh workers.
+    """
+
+    def __init__(self, workers, initializer=None):
+        self.workers = workers
+        self.initializer = initializer
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=self.initializer)
+            return self._executor
+
+    def discard(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,133 @@
+import cProfile
+import json
+import os
+import threading
+import time
+
+from metrics import log
+
+# Opt-in: /api/plan requests slower than PLANNER_PROFILE_THRESHOLD seconds
+# have their cProfile saved to PLANNER_PROFILE_DIR (0 or unset: off)
+PROFILE_THRESHOLD = float(os.environ.get("PLANNER_PROFILE_THRESHOLD", "0"))
+PROFILE_DIR = os.environ.get("PLANNER_PROFILE_DIR", "profiles")
+# Oldest profiles are deleted once the directory holds more than this
+PROFILE_MAX_MB = float(os.environ.get("PLANNER_PROFILE_MAX_MB", "50"))
+
+class SlowRequestProfiler:
+    """
+    Profiles calls with cProfile and keeps only the slow ones
+
+    call(fn, ...) runs fn under cProfile; if it took longer than `threshold`
+    seconds, <name>.prof (pstats format) and <name>.json (the request
+    payload, arguments and timing) are written to `directory`. After each
+    save the oldest files are deleted until the directory is under
+    `max_bytes`.
+
+    cProfile allows one active profiler per process at a time, so only one
+    call is profiled at once; calls made meanwhile run unprofiled (counted
+    as skipped), and the slow ones still get their .json, marked
+    "profiled": false. Work in other processes (the CSP pool) is not captured.
+    """
+
+    def __init__(self, directory=PROFILE_DIR, threshold=1.0, max_bytes=50 * 1024 * 1024):
+        self.directory = directory
+        self.threshold = threshold
+        self.max_bytes = max_bytes
+        self._busy = threading.Lock()
+        self._lock = threading.Lock()
+        self.profiled = 0
+        self.skipped = 0
+        self.saved = 0
+        self.deleted = 0
+
+    def call(self, fn, *args, request_payload=None, **kwargs):
+        """fn(*args, **kwargs), profiled if no other call is; returns its result"""
+        if not self._busy.acquire(blocking=False):
+            with self._lock:
+                self.skipped += 1
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                if elapsed > self.threshold:
+                    self._save(None, elapsed, fn, args, kwargs, request_payload)
+        try:
+            profile = cProfile.Profile()
+            start = time.perf_counter()
+            try:
+                return profile.runcall(fn, *args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                with self._lock:
+                    self.profiled += 1
+                if elapsed > self.threshold:
+                    self._save(profile, elapsed, fn, args, kwargs, request_payload)
+        finally:
+            self._busy.release()
+
+    def _save(self, profile, elapsed, fn, args, kwargs, request_payload):
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{time.time_ns() % 10**9:09d}-{round(elapsed * 1000)}ms"
+        details = {
+            'function': getattr(fn, '__name__', repr(fn)),
+            'args': [repr(a) for a in args],
+            'kwargs': {k: repr(v) for k, v in kwargs.items()},
+            'request': request_payload,
+            'elapsed_s': round(elapsed, 6),
+            'threshold_s': self.threshold,
+            'profiled': profile is not None,
+        }
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            if profile is not None:
+                profile.dump_stats(os.path.join(self.directory, name + ".prof"))
+            with open(os.path.join(self.directory, name + ".json"), 'w') as f:
+                json.dump(details, f, indent=2, default=repr)
+        except OSError as e:
+            log.warning("Could not save profile %s: %s", name, e)
+            return
+        with self._lock:
+            self.saved += 1
+        log.info("Slow request (%.3fs) %s to %s", elapsed, "profiled" if profile else "recorded",
+                 os.path.join(self.directory, name))
+        self._rotate()
+
+    def _rotate(self):
+        """Delete the oldest profiles until the directory fits in max_bytes"""
+        with self._lock:
+            try:
+                entries = []
+                for entry in os.scandir(self.directory):
+                    if entry.is_file() and entry.name.endswith((".prof", ".json")):
+                        entries.append((entry.name, entry.stat().st_size))
+            except OSError:
+                return
+            total = sum(size for _, size in entries)
+            # Names start with the save time: oldest first, a .prof next to its .json
+            for name, size in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    continue
+                total -= size
+                self.deleted += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'directory': self.directory,
+                'threshold': self.threshold,
+                'max_bytes': self.max_bytes,
+                'profiled': self.profiled,
+                'skipped': self.skipped,
+                'saved': self.saved,
+                'deleted': self.deleted,
+            }
+
+def get_slow_profiler():
+    """SlowRequestProfiler configured from the environment, or None when disabled"""
+    if PROFILE_THRESHOLD <= 0:
+        return None
+    return SlowRequestProfiler(PROFILE_DIR, PROFILE_THRESHOLD, int(PROFILE_MAX_MB * 1024 * 1024))
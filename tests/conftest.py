@@ -0,0 +1,12 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+@pytest.fixture(autouse=True)
+def repo_cwd(monkeypatch):
+    # advisor.pl and university.db are opened relative to the repository root
+    monkeypatch.chdir(ROOT)
@@ -0,0 +1,62 @@
+import pytest
+
+import prolog_interface
+from advisor_rules import RuleError, RuleSet
+from prolog_interface import ADVICE_QUERIES, get_rules
+
+# Every CGPA to two decimals, so on, just below and just above each threshold
+CGPAS = [i / 100 for i in range(401)]
+CREDITS = range(10, 25)
+HARD_COUNTS = range(0, 9)
+
+def expected_rules(cgpa, credits, hard_count):
+    """advisor.pl's advice rules, transcribed clause by clause"""
+    risk = cgpa < 2.5
+    moderate_risk = 2.5 <= cgpa < 3.0
+    safe = cgpa >= 3.0
+    return {
+        'warn': risk and credits > 18,
+        'warn_moderate': moderate_risk and 15 <= credits <= 18,
+        'warn_difficulty': risk and hard_count > 4,
+        'recommend_reduce': risk and credits > 15,
+        'recommend_limit_hard': moderate_risk and hard_count > 3,
+        'recommend_increase': safe and credits < 12,
+    }
+
+def test_compiled_rules_match_advisor_pl():
+    rules = get_rules()
+    for cgpa in CGPAS:
+        for credits in CREDITS:
+            for hard_count in HARD_COUNTS:
+                values = {'cgpa': cgpa, 'credits': credits, 'hard_count': hard_count}
+                assert rules.evaluate(ADVICE_QUERIES, values) == expected_rules(cgpa, credits, hard_count), values
+
+def test_helper_predicates():
+    rules = get_rules()
+    for cgpa in CGPAS:
+        assert rules.holds('can_take_advanced', cgpa) == (cgpa >= 2.5)
+        assert rules.holds('should_repeat', cgpa) == (cgpa < 2.0)
+
+def test_constants_follow_arguments_into_called_predicates():
+    rules = RuleSet("""
+        low(X) :- X < 1.5.
+        exact(2.25).
+        warn(CGPA, Credits) :- low(CGPA), Credits > 18.
+        warn(CGPA, Credits) :- exact(CGPA), Credits >= 12.
+        warn(CGPA, _) :- 3.5 =< CGPA.
+        other(X) :- X > 9.
+    """)
+    assert rules.constants('warn', 2, 0) == {1.5, 2.25, 3.5}
+    assert rules.constants('warn', 2, 1) == {18, 12}
+
+def test_unsupported_syntax_is_rejected():
+    with pytest.raises(RuleError):
+        RuleSet("p(X) :- X is 1 + 2.")
+
+def test_compiled_rules_match_swi_prolog():
+    pytest.importorskip("pyswip")
+    for cgpa in CGPAS:
+        for credits in CREDITS:
+            for hard_count in HARD_COUNTS:
+                values = {'cgpa': cgpa, 'credits': credits, 'hard_count': hard_count}
+                assert prolog_interface.evaluate_rules_local(values) == get_rules().evaluate(ADVICE_QUERIES, values)
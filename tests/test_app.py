@@ -0,0 +1,163 @@
+import json
+import os
+import sqlite3
+
+import pytest
+
+import app
+from cache import LRUCache
+from catalog import Catalog
+from generate_catalog import generate_catalog
+from serving import ServerBusyError
+
+PLAN = {'program_id': 1, 'semester': 2, 'max_credits': 15, 'preference': 'easy', 'cgpa': 3.2}
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "catalog.db")
+    generate_catalog(path, departments=1, programs_per_department=1, courses_per_semester=8, seed=1)
+    return path
+
+@pytest.fixture
+def client(db_path, monkeypatch):
+    """Test client on a small generated catalog, with no plan index and an empty response cache"""
+    monkeypatch.setattr(app, "catalog", Catalog(db_path))
+    monkeypatch.setattr(app, "plan_index", None)
+    monkeypatch.setattr(app, "response_cache", LRUCache(16))
+    return app.app.test_client()
+
+def change_catalog(db_path):
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("UPDATE courses SET name = name || ' (revised)'")
+    conn.close()
+    stat = os.stat(db_path)
+    os.utime(db_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+def test_repeated_plan_is_served_from_the_cache(client):
+    first = client.post('/api/plan', json=PLAN)
+    assert first.status_code == 200 and first.headers['X-Plan-Cache'] == 'MISS'
+    # Same normalized request: other spellings of the same values share the entry
+    second = client.post('/api/plan', json=dict(PLAN, program_id="1", preference="EASY"))
+    assert second.headers['X-Plan-Cache'] == 'HIT'
+    assert second.get_data() == first.get_data() and second.headers['ETag'] == first.headers['ETag']
+
+def test_matching_etag_gets_304(client):
+    etag = client.post('/api/plan', json=PLAN).headers['ETag']
+    response = client.post('/api/plan', json=PLAN, headers={'If-None-Match': etag})
+    assert response.status_code == 304 and response.get_data() == b""
+    assert response.headers['ETag'] == etag
+    other = client.post('/api/plan', json=PLAN, headers={'If-None-Match': '"something-else"'})
+    assert other.status_code == 200
+
+def test_bypass_neither_reads_nor_fills_the_cache(client):
+    response = client.post('/api/plan', json=PLAN, headers={'X-Plan-Cache': 'bypass'})
+    assert response.status_code == 200 and response.headers['X-Plan-Cache'] == 'BYPASS'
+    assert len(app.response_cache) == 0
+    assert client.post('/api/plan', json=PLAN).headers['X-Plan-Cache'] == 'MISS'
+    response = client.post('/api/plan', json=PLAN, headers={'X-Plan-Cache': 'bypass'})
+    assert response.headers['X-Plan-Cache'] == 'BYPASS'
+
+def test_catalog_change_gets_a_new_etag(client, db_path):
+    first = client.post('/api/plan', json=PLAN)
+    change_catalog(db_path)
+    second = client.post('/api/plan', json=PLAN, headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 200 and second.headers['X-Plan-Cache'] == 'MISS'
+    assert second.headers['ETag'] != first.headers['ETag']
+    assert second.get_json()['plans'][0]['courses'][0]['name'].endswith('(revised)')
+
+def test_batch_runs_one_search_per_group(client, monkeypatch):
+    searches = []
+    search_semester = app.search_semester
+
+    def counting_search(*args, **kwargs):
+        searches.append(args[:4])
+        return search_semester(*args, **kwargs)
+
+    monkeypatch.setattr(app, "search_semester", counting_search)
+    other = dict(PLAN, max_credits=18)
+    requests = [dict(PLAN, cgpa=2.0), dict(other, cgpa=3.5), {'program_id': 1}, dict(PLAN, cgpa=3.8),
+                dict(other, cgpa=2.6, preference="Easy"), "not an object"]
+    response = client.post('/api/plan/batch', json={'requests': requests})
+    assert response.status_code == 200 and response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    assert [line['index'] for line in lines] == list(range(len(requests)))
+    assert [line['status'] for line in lines] == [200, 200, 400, 200, 200, 400]
+    assert sorted(searches) == [(1, 2, 15, 'easy'), (1, 2, 18, 'easy')]
+    # Shared search, per-student advice: each line is what /api/plan answers
+    for request, line in zip(requests, lines):
+        if line['status'] == 200:
+            single = client.post('/api/plan', json=request, headers={'X-Plan-Cache': 'bypass'})
+            assert line['response'] == single.get_json()
+    assert lines[0]['response']['cgpa'] == 2.0 and lines[3]['response']['cgpa'] == 3.8
+
+def test_busy_executor_answers_503_with_retry_after(client, monkeypatch):
+    def busy(*args, **kwargs):
+        raise ServerBusyError("All 1 planners busy and 0 requests queued")
+
+    monkeypatch.setattr(app.plan_executor, "run", busy)
+    for path, body in (('/api/plan', PLAN), ('/api/roadmap', dict(PLAN, semester=7))):
+        response = client.post(path, json=body)
+        assert response.status_code == 503 and response.headers['Retry-After'] == '1'
+    line = json.loads(client.post('/api/plan/batch', json=[PLAN]).get_data())
+    assert line['status'] == 503
+    assert len(app.response_cache) == 0
+
+def test_deadline_returns_partial_plans_uncached(client, monkeypatch):
+    rank_semester = app.rank_semester
+
+    def cut_short(*args, **kwargs):
+        plans = rank_semester(*args, **kwargs)[:2]
+        kwargs['stats']['deadline_hit'] = True
+        return plans
+
+    monkeypatch.setattr(app, "rank_semester", cut_short)
+    response = client.post('/api/plan', json=PLAN)
+    assert response.status_code == 200 and response.get_json()['partial'] is True
+    assert len(response.get_json()['plans']) == 2
+    assert len(app.response_cache) == 0
+    line = json.loads(client.post('/api/plan/batch', json=[PLAN]).get_data())
+    assert line['status'] == 200 and line['response']['partial'] is True
+
+def test_deadline_without_plans_answers_503(client, monkeypatch):
+    def nothing_found(*args, **kwargs):
+        kwargs['stats']['deadline_hit'] = True
+        return []
+
+    monkeypatch.setattr(app, "rank_semester", nothing_found)
+    response = client.post('/api/plan', json=PLAN)
+    assert response.status_code == 503
+    assert len(app.response_cache) == 0
+
+def scrape(client):
+    """/metrics as {series: value}"""
+    response = client.get('/metrics')
+    assert response.status_code == 200 and response.mimetype == 'text/plain'
+    series = {}
+    for line in response.get_data(as_text=True).splitlines():
+        if line and not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            series[name] = float(value)
+    return series
+
+def test_metrics_count_stages_searches_and_requests(client):
+    before = scrape(client)
+    client.post('/api/plan', json=PLAN)
+    client.post('/api/plan', json=PLAN)  # cache hit: no search
+    after = scrape(client)
+
+    def delta(name):
+        return after.get(name, 0) - before.get(name, 0)
+
+    assert delta('planner_stage_seconds_count{stage="search"}') == 1
+    assert delta('planner_stage_seconds_count{stage="db_fetch"}') == 2
+    assert delta('planner_stage_seconds_count{stage="advice"}') == len(
+        client.post('/api/plan', json=PLAN).get_json()['plans'])
+    assert delta('planner_search_plans_count') == 1
+    assert sum(delta(f'planner_search_outcomes_total{{outcome="{outcome}"}}')
+               for outcome in ('complete', 'stopped_early', 'deadline')) == 1
+    assert delta('planner_request_seconds_count{endpoint="/api/plan",status="200"}') == 2
+    assert after['planner_cache_hits{cache="response"}'] == 1
+    assert after['planner_cache_size{cache="response"}'] == 1
+    assert delta('planner_executor_completed') == 1
@@ -0,0 +1,37 @@
+import cache
+from cache import LRUCache
+
+def test_least_recently_used_entry_is_evicted():
+    lru = LRUCache(2)
+    lru.put('a', 1)
+    lru.put('b', 2)
+    assert lru.get('a') == 1  # 'b' is now the least recently used
+    lru.put('c', 3)
+    assert lru.get('b') is None
+    assert lru.get('a') == 1 and lru.get('c') == 3
+    assert lru.stats()['evictions'] == 1 and len(lru) == 2
+
+def test_put_refreshes_an_existing_key():
+    lru = LRUCache(2)
+    lru.put('a', 1)
+    lru.put('b', 2)
+    lru.put('a', 10)
+    lru.put('c', 3)
+    assert lru.get('a') == 10 and lru.get('b') is None
+
+def test_size_zero_disables_caching():
+    lru = LRUCache(0)
+    lru.put('a', 1)
+    assert lru.get('a') is None and len(lru) == 0
+    assert lru.stats()['misses'] == 1
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    lru = LRUCache(4, ttl=10)
+    lru.put('a', 1)
+    now[0] += 9
+    assert lru.get('a') == 1
+    now[0] += 1
+    assert lru.get('a') is None
+    assert lru.stats()['expirations'] == 1 and len(lru) == 0
@@ -0,0 +1,50 @@
+import os
+import sqlite3
+
+import pytest
+
+from catalog import Catalog
+from generate_catalog import generate_catalog
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "catalog.db")
+    generate_catalog(path, departments=1, programs_per_department=1, courses_per_semester=6, seed=1)
+    return path
+
+def set_credits(db_path, code, credits):
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("UPDATE courses SET credits = ? WHERE code = ?", (credits, code))
+    conn.close()
+    # Make sure the mtime moves even on filesystems with coarse timestamps
+    stat = os.stat(db_path)
+    os.utime(db_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+def credits_of(catalog, code):
+    return next(c['credits'] for c in catalog.courses_for_semester(1, 1) if c['code'] == code)
+
+def test_reloads_when_the_database_changes(db_path):
+    catalog = Catalog(db_path)
+    code = catalog.courses_for_semester(1, 1)[0]['code']
+    old = credits_of(catalog, code)
+    version = catalog.version()
+    assert catalog.loads == 1
+
+    credits_of(catalog, code)
+    assert catalog.loads == 1  # unchanged file: served from memory
+
+    set_credits(db_path, code, old + 1)
+    assert credits_of(catalog, code) == old + 1
+    assert catalog.loads == 2
+    assert catalog.version() != version
+
+def test_without_mtime_checks_only_invalidate_reloads(db_path):
+    catalog = Catalog(db_path, check_mtime=False)
+    code = catalog.courses_for_semester(1, 1)[0]['code']
+    old = credits_of(catalog, code)
+
+    set_credits(db_path, code, old + 1)
+    assert credits_of(catalog, code) == old
+    catalog.invalidate()
+    assert credits_of(catalog, code) == old + 1
@@ -0,0 +1,40 @@
+import random
+
+import pytest
+
+from course_set import DIFFICULTY_LEVELS, SemesterCourses
+from csp import PrerequisiteChecker, check_prerequisites
+
+def random_courses(rng, n, completed):
+    codes = [c['code'] for c in completed]
+    courses = []
+    for i in range(n):
+        prereqs = rng.sample(codes + ["XX999"], rng.randint(0, 2)) if codes else []
+        courses.append({'id': 100 + i, 'code': f"CS{100 + i}", 'name': f"Course {i}", 'description': "",
+                        'credits': rng.randint(1, 4), 'difficulty': rng.choice(DIFFICULTY_LEVELS),
+                        'prerequisites': ", ".join(prereqs)})
+    return courses
+
+@pytest.mark.parametrize("seed", range(10))
+def test_semester_courses_match_list_path(seed):
+    rng = random.Random(seed)
+    completed = [{'code': f"CS{i}"} for i in range(rng.randint(0, 6))]
+    courses = random_courses(rng, 12, completed)
+    course_set = SemesterCourses(courses, PrerequisiteChecker(completed))
+
+    assert course_set.prereq_met == [check_prerequisites(c, completed) for c in courses]
+    for _ in range(50):
+        mask = rng.getrandbits(len(courses))
+        chosen = [c for i, c in enumerate(courses) if (mask >> i) & 1]
+        assert course_set.indices(mask) == [i for i in range(len(courses)) if (mask >> i) & 1]
+        assert course_set.total_credits(mask) == sum(c['credits'] for c in chosen)
+        violations = sum(not check_prerequisites(c, completed) for c in chosen)
+        assert course_set.violations(mask) == violations
+        assert course_set.difficulty_counts(mask) == [sum(c['difficulty'] == d for c in chosen)
+                                                      for d in DIFFICULTY_LEVELS]
+        assert course_set.materialize(mask) == {
+            'courses': chosen,
+            'total_credits': sum(c['credits'] for c in chosen),
+            'constraint_violations': violations,
+            'all_prereqs_met': violations == 0,
+        }
@@ -0,0 +1,63 @@
+import random
+from itertools import combinations
+
+import pytest
+
+from course_set import DIFFICULTY_LEVELS
+from csp import check_prerequisites, csp_filter, exact_credit_subsets, plan_combos, reachable_credit_table
+
+def random_credits(rng, n):
+    return [rng.randint(1, 4) for _ in range(n)]
+
+def brute_force(credits, target_credits, size):
+    return [combo for combo in combinations(range(len(credits)), size)
+            if sum(credits[i] for i in combo) == target_credits]
+
+@pytest.mark.parametrize("seed", range(20))
+def test_exact_credit_subsets_match_brute_force(seed):
+    rng = random.Random(seed)
+    credits = random_credits(rng, rng.randint(0, 10))
+    table = reachable_credit_table(credits)
+    for size in range(len(credits) + 2):
+        for target_credits in range(0, 4 * size + 2):
+            expected = brute_force(credits, target_credits, size)
+            assert list(exact_credit_subsets(credits, target_credits, size, table)) == expected
+
+@pytest.mark.parametrize("seed", range(10))
+def test_plan_combos_required_and_limit(seed):
+    rng = random.Random(seed)
+    credits = random_credits(rng, 9)
+    required = rng.getrandbits(9)
+    for size in range(1, 6):
+        for target_credits in range(size, 4 * size + 1):
+            expected = [combo for combo in brute_force(credits, target_credits, size)
+                        if not required or any((required >> i) & 1 for i in combo)]
+            assert list(plan_combos(credits, target_credits, size, required=required)) == expected
+            assert list(plan_combos(credits, target_credits, size, required=required, limit=3)) == expected[:3]
+
+def random_courses(rng, n, completed):
+    codes = [c['code'] for c in completed]
+    courses = []
+    for i in range(n):
+        prereqs = rng.sample(codes + ["XX999"], rng.randint(0, 2)) if codes else []
+        courses.append({'id': 100 + i, 'code': f"CS{100 + i}", 'name': f"Course {i}", 'description': "",
+                        'credits': rng.randint(1, 4), 'difficulty': rng.choice(DIFFICULTY_LEVELS),
+                        'prerequisites': ", ".join(prereqs)})
+    return courses
+
+@pytest.mark.parametrize("seed", range(5))
+def test_csp_filter_plans_are_exact_and_unique(seed):
+    rng = random.Random(seed)
+    completed = [{'code': f"CS{i}"} for i in range(4)]
+    courses = random_courses(rng, 10, completed)
+    plans = csp_filter(courses, 12, completed_courses=completed)
+    seen = set()
+    for plan in plans:
+        codes = tuple(c['code'] for c in plan['courses'])
+        assert codes not in seen and len(set(codes)) == len(codes)
+        seen.add(codes)
+        assert plan['total_credits'] == sum(c['credits'] for c in plan['courses']) == 12
+        assert plan['constraint_violations'] == sum(not check_prerequisites(c, completed)
+                                                    for c in plan['courses'])
+    # Fewer violations first
+    assert [p['constraint_violations'] for p in plans] == sorted(p['constraint_violations'] for p in plans)
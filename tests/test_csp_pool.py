@@ -0,0 +1,60 @@
+import time
+
+import pytest
+
+from catalog import Catalog
+from course_set import SemesterCourses
+from csp import PrerequisiteChecker
+from csp_pool import CSPPool
+from generate_catalog import generate_catalog
+from pipeline import rank_plans
+
+@pytest.fixture(scope="module")
+def semesters(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("csp_pool") / "wide.db")
+    generate_catalog(path, departments=1, programs_per_department=1, courses_per_semester=30,
+                     prereq_density=0.3, max_prereqs=2, seed=4)
+    catalog = Catalog(path, check_mtime=False)
+    return [SemesterCourses(catalog.courses_for_semester(1, semester),
+                            PrerequisiteChecker(catalog.completed_courses(1, semester)))
+            for semester in (2, 5)]
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = CSPPool(workers=1, min_courses=20)
+    yield pool
+    pool.shutdown()
+
+def test_pooled_search_matches_in_thread_search(pool, semesters):
+    for course_set in semesters:
+        for preference in ("easy", "balanced", "challenging"):
+            stats, expected_stats = {}, {}
+            assert pool.rank(course_set, 18, preference, stats=stats) == \
+                rank_plans(course_set, 18, preference, stats=expected_stats)
+            assert stats == expected_stats
+    assert pool.stats()['pooled_searches'] == 6
+
+def test_narrow_semester_stays_in_thread(semesters):
+    pool = CSPPool(workers=1, min_courses=len(semesters[0]) + 1)
+    assert pool.rank(semesters[0], 18, "balanced") == rank_plans(semesters[0], 18, "balanced")
+    assert pool.stats()['sequential_searches'] == 1
+    assert pool.stats()['pooled_searches'] == 0
+
+def test_deadline_gives_partial_result(pool, semesters):
+    pool.rank(semesters[0], 18, "balanced")  # workers started
+    stats = {}
+    start = time.monotonic()
+    plans = pool.rank(semesters[1], 18, "balanced", stats=stats, deadline=start)
+    assert stats['deadline_hit']
+    assert plans == []
+    assert time.monotonic() - start < pool.grace + 0.5
+
+def test_unanswered_worker_is_not_an_error(semesters):
+    pool = CSPPool(workers=1, min_courses=20, grace=0.0)
+    try:
+        stats = {}
+        assert pool.rank(semesters[0], 18, "balanced", stats=stats, deadline=time.monotonic()) == []
+        assert stats['deadline_hit']
+        assert pool.stats()['timeouts'] == 1
+    finally:
+        pool.shutdown()
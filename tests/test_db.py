@@ -0,0 +1,47 @@
+import shutil
+import sqlite3
+
+from catalog import DB_PATH
+from db import ConnectionPool, Database
+from prereq_graph import migrate
+
+def journal_mode(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("PRAGMA journal_mode").fetchone()[0]
+    finally:
+        conn.close()
+
+def copy_catalog(tmp_path):
+    path = str(tmp_path / "catalog.db")
+    shutil.copy(DB_PATH, path)
+    return path
+
+def test_journal_mode_is_left_alone_by_default(tmp_path):
+    path = copy_catalog(tmp_path)
+    before = journal_mode(path)
+    assert Database(ConnectionPool(path)).departments()
+    assert journal_mode(path) == before
+
+def test_wal_option_and_migrate_keeps_it(tmp_path):
+    path = copy_catalog(tmp_path)
+    database = Database(ConnectionPool(path, journal_mode="wal"))
+    assert database.departments()
+    assert journal_mode(path) == "wal"
+
+    conn = sqlite3.connect(path)
+    with conn:
+        migrate(conn)
+    conn.close()
+    assert journal_mode(path) == "wal"
+
+def test_version_sees_writes_to_the_wal(tmp_path):
+    path = copy_catalog(tmp_path)
+    database = Database(ConnectionPool(path, journal_mode="wal"))
+    version = database.version()
+    writer = sqlite3.connect(path)
+    with writer:
+        writer.execute("UPDATE departments SET name = name || ' (renamed)' WHERE id = 1")
+    assert database.version() != version
+    assert database.departments()[0]['name'].endswith("(renamed)")
+    writer.close()
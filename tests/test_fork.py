@@ -0,0 +1,44 @@
+import os
+
+import pytest
+
+from db import ConnectionPool
+from generate_catalog import generate_catalog
+from plan_index import PlanIndex, build_index
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork()")
+
+def in_child(check):
+    """Run check() in a forked child; True when it returned truthy there"""
+    pid = os.fork()
+    if pid == 0:
+        try:
+            code = 0 if check() else 1
+        except BaseException:
+            code = 2
+        os._exit(code)
+    _, status = os.waitpid(pid, 0)
+    return os.waitstatus_to_exitcode(status) == 0
+
+def test_plan_index_reopens_after_fork(tmp_path):
+    db_path, index_path = str(tmp_path / "catalog.db"), str(tmp_path / "plan_index.db")
+    generate_catalog(db_path, departments=1, programs_per_department=1, courses_per_semester=6, seed=1)
+    build_index(db_path, index_path)
+    index = PlanIndex(db_path, index_path, auto_rebuild=False)
+    assert index.warm_up()
+    parent_conn = index._conn
+    index._lock.acquire()  # e.g. held by a rebuild thread when the fork happens
+    try:
+        assert in_child(lambda: index._conn is None and index.lookup(1, 1, 15, 'balanced') is not None
+                        and index._conn is not parent_conn)
+    finally:
+        index._lock.release()
+    assert index._conn is parent_conn
+
+def test_connection_pool_starts_empty_after_fork():
+    pool = ConnectionPool(size=2)
+    assert pool.query("SELECT 1 AS one") == [{'one': 1}]
+    assert in_child(lambda: pool.stats()['connections'] == 0
+                    and pool.query("SELECT 1 AS one") == [{'one': 1}]
+                    and pool.stats()['connections'] == 1)
+    assert pool.stats()['connections'] == 1
@@ -0,0 +1,55 @@
+import random
+
+import pytest
+
+from course_set import DIFFICULTY_LEVELS, SemesterCourses
+from csp import PrerequisiteChecker, exact_credit_subsets
+from ga import fitness, fitness_batch, fitness_mask, plan_matrix, score_stream
+
+PREFERENCES = ["Easy", "Balanced", "Challenging"]
+
+def random_course_set(rng, n):
+    completed = [{'code': "CS1"}]
+    courses = [{'id': i, 'code': f"CS{100 + i}", 'credits': rng.randint(1, 4),
+                'difficulty': rng.choice(DIFFICULTY_LEVELS),
+                'prerequisites': rng.choice(["", "CS1", "CS2", "CS1, CS3"])} for i in range(n)]
+    return SemesterCourses(courses, PrerequisiteChecker(completed))
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("preference", PREFERENCES)
+def test_fitness_mask_matches_fitness(seed, preference):
+    rng = random.Random(seed)
+    course_set = random_course_set(rng, 14)
+    for _ in range(50):
+        mask = rng.getrandbits(len(course_set))
+        target_credits = rng.randint(11, 24)
+        assert fitness_mask(course_set, mask, preference, target_credits) == \
+            fitness(course_set.materialize(mask), preference, target_credits)
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("preference", PREFERENCES)
+def test_fitness_batch_matches_fitness_mask(seed, preference):
+    pytest.importorskip("numpy")
+    rng = random.Random(seed)
+    # Past 8 and 16 courses the bitmasks span several bytes
+    course_set = random_course_set(rng, rng.choice([3, 8, 9, 17, 30]))
+    masks = [rng.getrandbits(len(course_set)) for _ in range(200)] + [0]
+    target_credits = rng.randint(11, 24)
+    expected = [fitness_mask(course_set, mask, preference, target_credits) for mask in masks]
+    assert fitness_batch(course_set, masks, preference, target_credits).tolist() == expected
+    assert fitness_batch(course_set, plan_matrix(course_set, masks), preference,
+                         target_credits).tolist() == expected
+
+def test_score_stream_batches_match_scalar_scores(monkeypatch):
+    pytest.importorskip("numpy")
+    import ga
+    rng = random.Random(1)
+    course_set = random_course_set(rng, 20)
+    # score_stream takes plans that hit the target
+    masks = [sum(1 << i for i in combo) for combo in exact_credit_subsets(course_set.credits, 18, 7)][:700]
+    assert len(masks) > 256
+    monkeypatch.setattr(ga, "BATCH_MIN_PLANS", 256)
+    batched = list(score_stream(course_set, masks, "Balanced", 18))
+    monkeypatch.setattr(ga, "BATCH_MIN_PLANS", 10 ** 6)
+    scalar = list(score_stream(course_set, masks, "Balanced", 18))
+    assert batched == scalar
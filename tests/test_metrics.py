@@ -0,0 +1,34 @@
+from metrics import Counter, Histogram, gauge_lines, render
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("demo_seconds", "Demo latency", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value, "search")
+    histogram.observe(0.01, "advice")
+    assert histogram.render() == [
+        "# HELP demo_seconds Demo latency",
+        "# TYPE demo_seconds histogram",
+        'demo_seconds_bucket{stage="advice",le="0.1"} 1',
+        'demo_seconds_bucket{stage="advice",le="1.0"} 1',
+        'demo_seconds_bucket{stage="advice",le="+Inf"} 1',
+        'demo_seconds_sum{stage="advice"} 0.01',
+        'demo_seconds_count{stage="advice"} 1',
+        'demo_seconds_bucket{stage="search",le="0.1"} 1',
+        'demo_seconds_bucket{stage="search",le="1.0"} 3',
+        'demo_seconds_bucket{stage="search",le="+Inf"} 4',
+        'demo_seconds_sum{stage="search"} 4.05',
+        'demo_seconds_count{stage="search"} 4',
+    ]
+
+def test_counter_and_gauge_lines_escape_labels():
+    counter = Counter("demo_total", "Demo events", ("outcome",))
+    counter.inc('say "hi"')
+    counter.inc('say "hi"', amount=2)
+    assert counter.render()[-1] == 'demo_total{outcome="say \\"hi\\""} 3'
+    assert gauge_lines("demo_size", "Demo size", {'a\\b': 2}, 'cache')[-1] == 'demo_size{cache="a\\\\b"} 2'
+    assert gauge_lines("demo_active", "Demo active", 0)[-1] == "demo_active 0"
+
+def test_render_ends_with_a_newline():
+    text = render(["extra 1"])
+    assert text.endswith("extra 1\n")
+    assert "# TYPE planner_stage_seconds histogram" in text
@@ -0,0 +1,72 @@
+import random
+import time
+
+import pytest
+
+from catalog import Catalog
+from course_set import DIFFICULTY_LEVELS, SemesterCourses
+from csp import PrerequisiteChecker, iter_plans
+from ga import EVOLVE_MIN_COURSES, EVOLVE_POPULATION, evolve, top_plans
+from generate_catalog import generate_catalog
+from pipeline import max_challenging, rank_plans
+
+@pytest.fixture(scope="module")
+def wide_semesters(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("pipeline") / "wide.db")
+    generate_catalog(path, departments=1, programs_per_department=1, courses_per_semester=26,
+                     prereq_density=0.3, max_prereqs=2, seed=3)
+    catalog = Catalog(path, check_mtime=False)
+    return [SemesterCourses(catalog.courses_for_semester(1, semester),
+                            PrerequisiteChecker(catalog.completed_courses(1, semester)))
+            for semester in (1, 4, 8)]
+
+def mixed_semester(rng):
+    """Courses with met prerequisites plus some whose prerequisite was never taken"""
+    completed = [{'code': "CS1"}]
+    courses = [{'id': i, 'code': f"CS{100 + i}", 'name': "", 'description': "",
+                'credits': rng.choice([3, 3, 3, 4]), 'difficulty': rng.choice(DIFFICULTY_LEVELS),
+                'prerequisites': "CS1" if i < clean else "CS9"}
+               for clean in [rng.randint(4, 8)] for i in range(clean + rng.randint(2, 6))]
+    return SemesterCourses(courses, PrerequisiteChecker(completed))
+
+@pytest.mark.parametrize("preference", ["Easy", "Balanced", "Challenging"])
+def test_early_stop_matches_full_ranking(preference):
+    rng = random.Random(7)
+    stopped = 0
+    for _ in range(40):
+        course_set = mixed_semester(rng)
+        for target_credits in (12, 15):
+            stats = {}
+            plans = rank_plans(course_set, target_credits, preference, stats=stats)
+            everything = list(iter_plans(course_set, target_credits))
+            assert plans == top_plans(course_set, everything, preference, target_credits)
+            stopped += stats['stopped_early']
+    # The bound has to actually cut searches short, not just agree with them
+    assert stopped
+
+def test_filtered_early_stop_matches_full_ranking():
+    rng = random.Random(8)
+    keep = max_challenging(1)
+    for _ in range(40):
+        course_set = mixed_semester(rng)
+        plans = rank_plans(course_set, 12, "Challenging", filters=[keep])
+        everything = [mask for mask in iter_plans(course_set, 12) if keep(course_set, mask)]
+        assert plans == top_plans(course_set, everything, "Challenging", 12)
+
+@pytest.mark.parametrize("preference", ["easy", "balanced", "challenging"])
+def test_ga_seeds_are_bounded(wide_semesters, preference):
+    for course_set in wide_semesters:
+        assert len(course_set) >= EVOLVE_MIN_COURSES
+        stats = {}
+        plans = rank_plans(course_set, 18, preference, stats=stats)
+        assert stats['plans_scored'] <= EVOLVE_POPULATION
+        # Same result as seeding evolve() with the whole CSP enumeration
+        everything = list(iter_plans(course_set, 18))
+        assert plans == evolve(course_set, 18, preference, seed=0, seed_plans=everything)
+
+def test_ga_path_respects_deadline(wide_semesters):
+    stats = {}
+    start = time.monotonic()
+    rank_plans(wide_semesters[0], 18, "balanced", stats=stats, deadline=start)
+    assert stats['deadline_hit']
+    assert time.monotonic() - start < 0.1
@@ -0,0 +1,104 @@
+import os
+import sqlite3
+import time
+
+import pytest
+
+import plan_index
+from catalog import Catalog
+from generate_catalog import generate_catalog
+from plan_index import IndexLockedError, PlanIndex, build_index, rank_key
+
+@pytest.fixture
+def catalog(tmp_path):
+    db_path, index_path = str(tmp_path / "catalog.db"), str(tmp_path / "plan_index.db")
+    generate_catalog(db_path, departments=1, programs_per_department=1, courses_per_semester=6, seed=1)
+    return db_path, index_path
+
+def touch(path, change_credits=False):
+    if change_credits:
+        conn = sqlite3.connect(path)
+        with conn:
+            conn.execute("UPDATE courses SET credits = credits + 1 WHERE id = (SELECT MIN(id) FROM courses)")
+        conn.close()
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+def test_lookups_come_from_the_index(catalog):
+    db_path, index_path = catalog
+    build_index(db_path, index_path)
+    index = PlanIndex(db_path, index_path, auto_rebuild=False)
+    live = Catalog(db_path, check_mtime=False)
+    for semester in (1, 4, 8):
+        for target_credits, preference in ((12, 'easy'), (15, 'balanced'), (18, 'challenging')):
+            assert index.lookup(1, semester, target_credits, preference) == \
+                rank_key(live, 1, semester, target_credits, preference)
+    assert index.lookup(1, 1, 30, 'balanced') is None  # not an indexed key
+    assert index.stats() == {'valid': True, 'rebuilding': False, 'hits': 9, 'misses': 1}
+
+def test_changed_catalog_makes_the_index_stale(catalog):
+    db_path, index_path = catalog
+    build_index(db_path, index_path)
+    index = PlanIndex(db_path, index_path, auto_rebuild=False)
+    assert index.lookup(1, 1, 15, 'balanced') is not None
+
+    touch(db_path)  # newer file, same content: still valid
+    assert index.lookup(1, 1, 15, 'balanced') is not None
+
+    touch(db_path, change_credits=True)
+    assert index.lookup(1, 1, 15, 'balanced') is None
+    assert not index.stats()['valid']
+
+    build_index(db_path, index_path)
+    assert index.lookup(1, 1, 15, 'balanced') is not None
+
+def test_build_refuses_a_held_lock(catalog):
+    db_path, index_path = catalog
+    with open(index_path + ".lock", "w") as f:
+        f.write("1")
+    with pytest.raises(IndexLockedError):
+        build_index(db_path, index_path)
+    assert not os.path.exists(index_path)
+    assert os.path.exists(index_path + ".lock")
+
+def test_build_takes_over_a_stale_lock(catalog):
+    db_path, index_path = catalog
+    with open(index_path + ".lock", "w") as f:
+        f.write("1")
+    old = time.time() - plan_index.LOCK_STALE - 1
+    os.utime(index_path + ".lock", (old, old))
+    assert build_index(db_path, index_path) > 0
+    assert not os.path.exists(index_path + ".lock")
+
+def test_no_rebuild_while_another_process_builds(catalog, monkeypatch):
+    db_path, index_path = catalog
+    with open(index_path + ".lock", "w") as f:
+        f.write("1")
+    started = []
+    monkeypatch.setattr(plan_index.threading, "Thread",
+                        lambda target, daemon: started.append(target) or _NotStarted())
+    index = PlanIndex(db_path, index_path)
+    assert not index.warm_up()
+    assert started == [] and not index.stats()['rebuilding']
+
+    os.remove(index_path + ".lock")
+    index._next_rebuild = 0.0
+    index.warm_up()
+    assert len(started) == 1 and index.stats()['rebuilding']
+
+def test_workers_share_one_rebuild(catalog):
+    db_path, index_path = catalog
+    first, second = PlanIndex(db_path, index_path), PlanIndex(db_path, index_path)
+    first.warm_up()
+    # second only starts its own thread when the lock is gone; either way
+    # exactly one build writes the file and both validate it
+    second.warm_up()
+    deadline = time.monotonic() + 30
+    while (first.stats()['rebuilding'] or second.stats()['rebuilding']) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert first.warm_up() and second.warm_up()
+    assert not os.path.exists(index_path + ".lock")
+
+class _NotStarted:
+    def start(self):
+        pass
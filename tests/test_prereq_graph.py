@@ -0,0 +1,58 @@
+import pytest
+
+from prereq_graph import PrerequisiteGraphError, build_graph, build_graphs
+
+KNOWN = {"CS101", "CS102", "CS201", "CS202", "CS301"}
+
+def test_valid_graph_order_and_closure():
+    offerings = [
+        (1, "CS101", frozenset()),
+        (1, "CS102", frozenset()),
+        (2, "CS201", frozenset({"CS101"})),
+        (3, "CS202", frozenset({"CS201", "CS102"})),
+        (4, "CS301", frozenset({"CS202"})),
+    ]
+    graph = build_graph(1, offerings, KNOWN)
+    position = {code: i for i, code in enumerate(graph.order)}
+    for _, code, prereqs in offerings:
+        assert all(position[p] < position[code] for p in prereqs)
+    assert graph.ancestors("CS301") == [c for c in graph.order if c in {"CS101", "CS102", "CS201", "CS202"}]
+    assert graph.checker(4, {"CS202"}).is_satisfied({'code': "CS301"})
+    assert not graph.checker(3, {"CS201"}).is_satisfied({'code': "CS202"})
+
+def test_retake_listing_itself_is_not_a_cycle():
+    graph = build_graph(1, [(1, "CS101", frozenset()), (2, "CS101", frozenset({"CS101"}))], KNOWN)
+    assert graph.order == ["CS101"]
+    assert graph.closure["CS101"] == 0
+    assert graph.requires[(2, "CS101")] == graph.bits["CS101"]
+
+def test_cycle_is_rejected():
+    offerings = [
+        (1, "CS101", frozenset({"CS202"})),
+        (2, "CS201", frozenset({"CS101"})),
+        (3, "CS202", frozenset({"CS201"})),
+        (3, "CS102", frozenset()),
+    ]
+    with pytest.raises(PrerequisiteGraphError, match="cycle among CS101, CS201, CS202"):
+        build_graph(7, offerings, KNOWN)
+
+def test_dangling_code_is_rejected():
+    offerings = [(1, "CS101", frozenset()), (2, "CS201", frozenset({"CS101", "MA999"}))]
+    with pytest.raises(PrerequisiteGraphError, match="CS201 -> MA999"):
+        build_graph(7, offerings, KNOWN)
+
+def test_build_graphs_isolates_invalid_programs():
+    rows = [
+        (1, 1, "CS101", ""),
+        (1, 2, "CS201", "CS101"),
+        (2, 1, "CS101", "CS201"),
+        (2, 2, "CS201", "CS101"),
+        (3, 2, "CS201", "MA999"),
+    ]
+    errors = {}
+    graphs = build_graphs(rows, KNOWN, errors)
+    assert sorted(graphs) == [1]
+    assert sorted(errors) == [2, 3]
+    assert all(isinstance(e, PrerequisiteGraphError) for e in errors.values())
+    with pytest.raises(PrerequisiteGraphError):
+        build_graphs(rows, KNOWN)
@@ -0,0 +1,44 @@
+import prolog_interface
+from cache import LRUCache
+from prolog_interface import ADVICE_QUERIES, build_advice, cgpa_band, cgpa_thresholds, get_rules
+
+# Every CGPA to two decimals, so on, just below and just above each threshold
+CGPAS = [i / 100 for i in range(401)]
+CREDITS = range(10, 25)
+HARD_COUNTS = range(0, 9)
+
+def test_cgpa_band_fires_the_same_rules():
+    # Every CGPA in a band fires the same rules, so advice can be cached per band
+    rules = get_rules()
+    fired = {}
+    for cgpa in CGPAS:
+        for credits in CREDITS:
+            for hard_count in HARD_COUNTS:
+                values = {'cgpa': cgpa, 'credits': credits, 'hard_count': hard_count}
+                result = rules.evaluate(ADVICE_QUERIES, values)
+                assert fired.setdefault((cgpa_band(cgpa), credits, hard_count), result) == result, values
+
+def test_cgpa_thresholds_are_the_advice_rules():
+    # should_repeat (CGPA < 2.0) is not one of the advice queries
+    assert cgpa_thresholds() == (2.5, 3.0)
+
+def test_cached_advice_matches_uncached():
+    prolog_interface.advice_cache.clear()
+    for cgpa in CGPAS:
+        for credits, hard_count in ((11, 0), (16, 4), (19, 5)):
+            courses = ([{'credits': credits - 2 * hard_count, 'difficulty': 'Easy'}]
+                       + [{'credits': 2, 'difficulty': 'Challenging'}] * hard_count)
+            assert prolog_interface.get_advice(cgpa, courses) == \
+                build_advice(cgpa, credits, 1, 0, hard_count)
+
+def test_advice_cache_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(prolog_interface, "advice_cache", LRUCache(2))
+    courses = [{'credits': 15, 'difficulty': 'Easy'}]
+    for cgpa in (2.0, 2.7, 3.5):  # three bands
+        prolog_interface.get_advice(cgpa, courses)
+    stats = prolog_interface.advice_cache.stats()
+    assert stats['size'] == 2 and stats['evictions'] == 1
+    prolog_interface.get_advice(2.1, courses)  # same band as 2.0, which was evicted
+    assert prolog_interface.advice_cache.stats()['misses'] == 4
+    prolog_interface.get_advice(3.9, courses)
+    assert prolog_interface.advice_cache.stats()['hits'] == 1
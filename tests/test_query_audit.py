@@ -0,0 +1,21 @@
+import shutil
+import sqlite3
+
+from catalog import DB_PATH
+from query_audit import audit_database
+
+def test_university_db_passes():
+    report, failures = audit_database(DB_PATH, None)
+    assert failures == []
+    assert report
+
+def test_missing_table_fails(tmp_path):
+    path = str(tmp_path / "catalog.db")
+    shutil.copy(DB_PATH, path)
+    conn = sqlite3.connect(path)
+    conn.execute("DROP TABLE prerequisite_order")
+    conn.commit()
+    conn.close()
+    report, failures = audit_database(path, None)
+    assert 'error' in report['prereq_graph.order']
+    assert any(line.startswith("prereq_graph.order:") for line in failures)
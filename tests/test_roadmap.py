@@ -0,0 +1,33 @@
+import time
+
+import pytest
+
+from catalog import Catalog
+from generate_catalog import generate_catalog
+from roadmap import LAST_SEMESTER, RoadmapPlanner
+
+@pytest.fixture(scope="module")
+def wide_catalog(tmp_path_factory):
+    # Wide, prerequisite-heavy semesters: a full search takes far longer than the budgets below
+    path = str(tmp_path_factory.mktemp("roadmap") / "wide.db")
+    generate_catalog(path, departments=1, programs_per_department=1, courses_per_semester=24,
+                     prereq_density=0.6, max_prereqs=3, seed=5)
+    return Catalog(path, check_mtime=False)
+
+@pytest.mark.parametrize("budget", [0.01, 0.05, 0.2])
+def test_budget_bounds_latency(wide_catalog, budget):
+    targets = {s: 18 for s in range(1, LAST_SEMESTER + 1)}
+    planner = RoadmapPlanner(wide_catalog, 1, 1, targets, "balanced", budget=budget)
+    start = time.monotonic()
+    total_fitness, steps = planner.plan()
+    elapsed = time.monotonic() - start
+
+    assert planner.budget_exhausted
+    assert elapsed < budget + 0.25
+    assert [semester for semester, _, _ in steps] == list(range(1, LAST_SEMESTER + 1))
+    taken = set()
+    for semester, course_set, mask in steps:
+        assert course_set.total_credits(mask) == targets[semester]
+        codes = {course_set.courses[i]['code'] for i in course_set.indices(mask)}
+        assert not codes & taken
+        taken |= codes
@@ -0,0 +1,72 @@
+import threading
+import time
+
+import pytest
+
+from serving import DeadlineExceededError, PlanExecutor, ServerBusyError
+
+def test_task_gets_a_deadline_from_the_budget():
+    executor = PlanExecutor(workers=1, queue=0, budget=2.0)
+    start = time.monotonic()
+    deadline = executor.run(lambda deadline: deadline)
+    assert start + 2.0 <= deadline <= time.monotonic() + 2.0
+    assert PlanExecutor(workers=1, queue=0, budget=0).run(lambda deadline: deadline) is None
+    assert executor.stats()['completed'] == 1
+
+def test_full_executor_rejects_right_away():
+    executor = PlanExecutor(workers=1, queue=1, budget=5.0)
+    release = threading.Event()
+    holders = [threading.Thread(target=executor.run, args=(lambda deadline: release.wait(),))
+               for _ in range(2)]
+    for holder in holders:
+        holder.start()
+    while executor.stats()['active'] < 1:
+        time.sleep(0.01)
+    start = time.monotonic()
+    try:
+        with pytest.raises(ServerBusyError):
+            executor.run(lambda deadline: None)
+        assert time.monotonic() - start < 0.5
+    finally:
+        release.set()
+        for holder in holders:
+            holder.join()
+    assert executor.stats()['rejected'] == 1
+    assert executor.run(lambda deadline: "free again") == "free again"
+
+def test_overrunning_task_raises_deadline_exceeded():
+    executor = PlanExecutor(workers=1, queue=0, budget=0.05, grace=0.05)
+    finished = threading.Event()
+
+    def overrun(deadline):
+        time.sleep(0.3)
+        finished.set()
+
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceededError):
+        executor.run(overrun)
+    assert time.monotonic() - start < 0.25
+    assert executor.stats()['deadlines_exceeded'] == 1
+    # The slot stays taken until the task really ends
+    with pytest.raises(ServerBusyError):
+        executor.run(lambda deadline: None)
+    finished.wait()
+    for _ in range(100):
+        try:
+            assert executor.run(lambda deadline: 1) == 1
+            break
+        except ServerBusyError:
+            time.sleep(0.01)
+    else:
+        pytest.fail("slot was never released")
+
+def test_task_timeout_error_is_not_a_deadline():
+    executor = PlanExecutor(workers=1, queue=0, budget=5.0)
+
+    def fail(deadline):
+        raise TimeoutError("worker did not answer")
+
+    with pytest.raises(TimeoutError, match="worker did not answer") as error:
+        executor.run(fail)
+    assert not isinstance(error.value, DeadlineExceededError)
+    assert executor.stats()['deadlines_exceeded'] == 0
@@ -0,0 +1,50 @@
+import json
+import os
+import threading
+import time
+
+from slow_profiler import SlowRequestProfiler
+
+def slow(seconds):
+    time.sleep(seconds)
+    return seconds
+
+def saved(directory):
+    return sorted(os.listdir(directory)) if os.path.isdir(directory) else []
+
+def test_slow_call_is_profiled(tmp_path):
+    profiler = SlowRequestProfiler(str(tmp_path), threshold=0.01)
+    assert profiler.call(slow, 0.02, request_payload={'id': 1}) == 0.02
+    assert profiler.call(slow, 0) == 0
+    names = saved(tmp_path)
+    assert [name.rsplit(".", 1)[1] for name in names] == ["json", "prof"]
+    with open(tmp_path / names[0]) as f:
+        details = json.load(f)
+    assert details['request'] == {'id': 1}
+    assert details['profiled'] is True
+
+def test_skipped_slow_call_is_recorded(tmp_path):
+    profiler = SlowRequestProfiler(str(tmp_path), threshold=0.05)
+    started = threading.Event()
+
+    def hold():
+        started.set()
+        time.sleep(0.2)
+
+    worker = threading.Thread(target=profiler.call, args=(hold,))
+    worker.start()
+    started.wait()
+    profiler.call(slow, 0.1, request_payload={'id': 2})
+    worker.join()
+
+    assert profiler.stats()['skipped'] == 1
+    records = []
+    for name in saved(tmp_path):
+        if name.endswith(".json"):
+            with open(tmp_path / name) as f:
+                records.append(json.load(f))
+    skipped = [r for r in records if r['request'] == {'id': 2}]
+    assert len(skipped) == 1
+    assert skipped[0]['profiled'] is False
+    assert skipped[0]['elapsed_s'] >= 0.1
+    assert len([n for n in saved(tmp_path) if n.endswith(".prof")]) == 1